@@ -8,9 +8,91 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "change-me-secret"
     CSRF_SECRET: str = "change-me-csrf"
     DATABASE_URL: str = "sqlite:///./senai_autohub.db"
+    # "sync" (threadpool) ou "async" (SQLAlchemy asyncio + aiosqlite)
+    DB_MODE: str = "sync"
+
+    # Perfil do SQLite: "default" ou "production" (WAL, pragmas, engines de
+    # leitura e escrita separados)
+    DB_PROFILE: str = "default"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 64 MiB por conexão
+    DB_READ_POOL_SIZE: int = 8
+    DB_READ_POOL_OVERFLOW: int = 8
+    DB_WRITE_POOL_TIMEOUT: int = 30
     SESSION_COOKIE_NAME: str = "senai_session"
     SESSION_EXPIRE_MINUTES: int = 60
 
+    # Uploads de materiais
+    MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024  # 2 GiB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Blobs sem referência mais novos que isso ficam fora do gc: são uploads
+    # ainda esperando o Material que vai apontar para eles.
+    BLOB_GC_GRACE_SECONDS: int = 3600
+
+    # Entrega de arquivos: "" (o próprio worker envia), "x-accel-redirect"
+    # (nginx, location interna em DOWNLOAD_ACCEL_PREFIX apontando para
+    # uploads/materials) ou "x-sendfile" (Apache/lighttpd, caminho absoluto)
+    DOWNLOAD_OFFLOAD: str = ""
+    DOWNLOAD_ACCEL_PREFIX: str = "/_protected/materials/"
+
+    # Logs de acesso gravados em lote por uma thread (ver access_log_writer).
+    # ACCESS_LOG_DURABILITY: "batched" (não espera o commit) ou "sync"
+    ACCESS_LOG_DURABILITY: str = "batched"
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
+    ACCESS_LOG_BATCH_SIZE: int = 500
+    ACCESS_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    ACCESS_LOG_ENQUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # Rollups de acesso (ver access_analytics); 0 desliga a agregação periódica
+    ACCESS_ROLLUP_INTERVAL_SECONDS: int = 300
+    ACCESS_ROLLUP_BATCH_SIZE: int = 20000
+
+    # Backup do banco pela API online do SQLite: páginas copiadas por passo e
+    # pausa entre passos (ms). BACKUP_ARCHIVE_FORMAT: "" (arquivo .db),
+    # "gz" ou "xz" (database.tar.gz / database.tar.xz)
+    BACKUP_DB_PAGES_PER_STEP: int = 1024
+    BACKUP_DB_STEP_SLEEP_MS: int = 5
+    BACKUP_ARCHIVE_FORMAT: str = ""
+    # Processos da verificação (0 = número de CPUs) e threads da restauração
+    BACKUP_VERIFY_WORKERS: int = 0
+    BACKUP_RESTORE_WORKERS: int = 8
+
+    # Hash de senha num pool de processos (0 = número de CPUs; concorrência
+    # 0 = 2x o pool). Sem vaga no tempo de espera, a rota responde 503.
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 0
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # Importação de alunos por CSV: linhas lidas, conferidas e inseridas por vez
+    STUDENT_IMPORT_CHUNK_ROWS: int = 500
+
+    # Templates: bytecode compilado em disco e cache de fragmentos ({% cache %}).
+    # TEMPLATE_AUTO_RELOAD=false evita checar o mtime dos arquivos a cada render.
+    TEMPLATE_BYTECODE_DIR: str = ".jinja_cache"
+    TEMPLATE_AUTO_RELOAD: bool = True
+    FRAGMENT_CACHE_TTL_SECONDS: int = 300
+    FRAGMENT_CACHE_MAX_ENTRIES: int = 2048
+
+    # Cache da página inicial para anônimos (por processo)
+    HOME_CACHE_MAX_ENTRIES: int = 512
+    HOME_CACHE_TTL_SECONDS: int = 300
+
+    # Métricas (/admin/metrics, formato Prometheus) e cabeçalho Server-Timing
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_HEADER: bool = True
+
+    # Cache do usuário logado (por processo)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+
+    # Busca de materiais: "fts" (índice FTS5 do SQLite) ou "like" (ilike)
+    SEARCH_BACKEND: str = "fts"
+
+    # Cache das contagens do catálogo (segundos)
+    CATALOG_COUNT_TTL_SECONDS: int = 300
+    SEARCH_COUNT_TTL_SECONDS: int = 30
+
     # Admin padrão (trocar em produção)
     ADMIN_EMAIL: str = "admin@senai.autohub"
     ADMIN_PASSWORD: str = "Admin123!"
@@ -1,41 +1,33 @@
 
-from typing import Optional
-
 from fastapi import Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
-
-from app.core.security import get_session_data
-from app.db.session import get_db
-from app.models.user import User, UserRole
 
+from app.core.principal import Principal, resolve_principal_async
+from app.models.user import UserRole
 
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db),
-) -> User:
-    """Retorna usuário autenticado ou lança 401."""
-    session_data = get_session_data(request)
-    if not session_data:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado.")
+# Dependências async: rodam no event loop, sem ocupar o threadpool. O usuário
+# normalmente já vem resolvido pelo AuthContextMiddleware; se não, a consulta
+# ao banco vai para o threadpool dentro de resolve_principal_async.
 
-    user_id = session_data.get("uid")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sessão inválida.")
 
-    user: Optional[User] = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+async def get_current_user(request: Request) -> Principal:
+    """Retorna usuário autenticado ou lança 401."""
+    # Já resolvido pelo AuthContextMiddleware (ou pelo cache de principal).
+    user = await resolve_principal_async(request)
     if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado.")
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado.")
 
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas administradores.")
     return current_user
 
 
-def require_professor_or_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_professor_or_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role not in (UserRole.ADMIN, UserRole.PROFESSOR):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas professores ou administradores.")
     return current_user
@@ -0,0 +1,118 @@
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+NEXT = "n"
+PREV = "p"
+
+
+class SortKey:
+    """Coluna usada na ordenação do keyset (ex.: created_at DESC)."""
+
+    __slots__ = ("column", "descending")
+
+    def __init__(self, column, descending: bool = True):
+        self.column = column
+        self.descending = descending
+
+
+class Page:
+    __slots__ = ("items", "next_cursor", "prev_cursor")
+
+    def __init__(self, items: list, next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    # Só os tipos que _encode_value produz; o resto (listas, null, objetos
+    # arbitrários) chegaria à comparação SQL e viraria erro 500.
+    if isinstance(value, dict):
+        if value.keys() != {"dt"} or not isinstance(value["dt"], str):
+            raise ValueError("cursor inválido")
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError("cursor inválido")
+    return value
+
+
+def encode_cursor(direction: str, values: Sequence[Any]) -> str:
+    raw = json.dumps([direction, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple[str, List[Any]]]:
+    """Decodifica o cursor; cursores inválidos voltam para a primeira página."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in (NEXT, PREV) or not isinstance(values, list) or len(values) != size:
+            return None
+        return direction, [_decode_value(v) for v in values]
+    except (ValueError, TypeError):
+        return None
+
+
+def _after(keys: Sequence[SortKey], values: Sequence[Any], forward: bool):
+    """Condição lexicográfica "vem depois de values" na ordem das chaves."""
+    clauses = []
+    for i, key in enumerate(keys):
+        descending = key.descending if forward else not key.descending
+        cmp = key.column < values[i] if descending else key.column > values[i]
+        equal = [keys[j].column == values[j] for j in range(i)]
+        clauses.append(and_(*equal, cmp))
+    return or_(*clauses)
+
+
+def paginate(query: Query, keys: Sequence[SortKey], cursor: Optional[str], limit: int) -> Page:
+    """Paginação por cursor (keyset): custo constante em qualquer profundidade.
+
+    A consulta não deve ter ``order_by``; a ordem vem de ``keys``, cuja última
+    chave precisa ser única (normalmente o ``id``).
+    """
+    decoded = decode_cursor(cursor, len(keys))
+    direction, values = decoded if decoded else (NEXT, None)
+    forward = direction == NEXT
+
+    query = query.add_columns(*[k.column for k in keys])
+    if values is not None:
+        query = query.filter(_after(keys, values, forward))
+
+    ordering = []
+    for key in keys:
+        descending = key.descending if forward else not key.descending
+        ordering.append(key.column.desc() if descending else key.column.asc())
+
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    n = len(keys)
+    items = [row[0] if len(row) == n + 1 else tuple(row[:-n]) for row in rows]
+    if not rows:
+        return Page(items, None, None)
+
+    first, last = tuple(rows[0][-n:]), tuple(rows[-1][-n:])
+    if forward:
+        next_cursor = encode_cursor(NEXT, last) if has_more else None
+        prev_cursor = encode_cursor(PREV, first) if values is not None else None
+    else:
+        next_cursor = encode_cursor(NEXT, last)
+        prev_cursor = encode_cursor(PREV, first) if has_more else None
+    return Page(items, next_cursor, prev_cursor)
@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import pwd_context
+
+# Hash de senha (pbkdf2_sha256) fora do processo da aplicação.
+#
+# O cálculo roda num ProcessPoolExecutor com PASSWORD_HASH_WORKERS processos
+# (padrão: número de CPUs), sem ocupar o threadpool nem o GIL do worker web.
+# No máximo PASSWORD_HASH_MAX_CONCURRENCY cálculos ficam em andamento ou na
+# fila do pool; quem não consegue vaga em PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+# recebe 503 na hora, em vez de esperar atrás de uma turma inteira.
+
+_executor: Optional[ProcessPoolExecutor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop = None
+
+
+def pool_size() -> int:
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def max_concurrency() -> int:
+    return settings.PASSWORD_HASH_MAX_CONCURRENCY or pool_size() * 2
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: o processo do servidor tem threads, que não convivem bem com fork.
+        _executor = ProcessPoolExecutor(
+            max_workers=pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(max_concurrency())
+        _semaphore_loop = loop
+    return _semaphore
+
+
+# Funções executadas nos processos do pool.
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify(password: str, password_hash: str) -> Tuple[bool, bool]:
+    """(senha confere, hash precisa ser refeito com os parâmetros atuais)"""
+    if not pwd_context.verify(password, password_hash):
+        return False, False
+    return True, pwd_context.needs_update(password_hash)
+
+
+def _noop() -> None:
+    pass
+
+
+async def _run(fn: Callable, *args):
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Muitas autenticações simultâneas. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        semaphore.release()
+
+
+async def hash_password(password: str) -> str:
+    """Hash num processo do pool. As rotas validam o formulário (na sessão
+    de leitura) e só depois chamam esta função, antes de abrir a transação
+    de escrita: o escritor único não fica preso durante o pbkdf2."""
+    return await _run(_hash, password)
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash de um lote (importação), dividido em uma fatia por processo.
+
+    Cada fatia ocupa uma única vaga do limite de concorrência, então um lote
+    grande usa no máximo ``pool_size()`` vagas e os logins continuam entrando.
+    """
+    if not passwords:
+        return []
+    size = -(-len(passwords) // pool_size())
+    slices = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    hashed = await asyncio.gather(*(_run(_hash_many, part) for part in slices))
+    return [h for part in hashed for h in part]
+
+
+async def verify_password(password: str, password_hash: str) -> Tuple[bool, bool]:
+    return await _run(_verify, password, password_hash)
+
+
+def start() -> None:
+    """Sobe os processos do pool na inicialização (evita o custo no 1º login)."""
+    executor = _get_executor()
+    for future in [executor.submit(_noop) for _ in range(pool_size())]:
+        future.result()
+
+
+def shutdown() -> None:
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def _bench_logins(logins: int, password: str, password_hash: str) -> float:
+    started = time.monotonic()
+    await asyncio.gather(*(verify_password(password, password_hash) for _ in range(logins)))
+    return time.monotonic() - started
+
+
+def benchmark(logins: int, worker_counts) -> list:
+    """Logins por segundo (verificações concorrentes) para cada tamanho de pool."""
+    password = "Senha-de-Benchmark-123"
+    password_hash = pwd_context.hash(password)
+    # Sem 503 no benchmark: todas as verificações esperam a vez.
+    settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = 3600.0
+
+    results = []
+    for workers in worker_counts:
+        settings.PASSWORD_HASH_WORKERS = workers
+        shutdown()
+        start()
+        seconds = asyncio.run(_bench_logins(logins, password, password_hash))
+        results.append({
+            "workers": workers,
+            "logins": logins,
+            "seconds": round(seconds, 3),
+            "logins_per_s": round(logins / seconds, 1) if seconds else 0.0,
+        })
+    shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede a vazão de logins por número de processos de hash.")
+    parser.add_argument("--logins", type=int, default=200, help="verificações simultâneas por rodada")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    counts = sorted({1, 2, 4, 8, 16, 32, args.max_workers})
+    counts = [n for n in counts if n <= args.max_workers]
+    baseline = None
+    for row in benchmark(args.logins, counts):
+        baseline = baseline or row["logins_per_s"]
+        speedup = row["logins_per_s"] / baseline if baseline else 0.0
+        print(f"[HASH] {row['workers']:>3} processos: {row['logins']} logins em {row['seconds']}s "
+              f"({row['logins_per_s']} logins/s, {speedup:.1f}x)")
@@ -0,0 +1,115 @@
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import get_session_data
+from app.db.session import ReadSessionLocal
+from app.models.user import User, UserRole
+
+# Usuário autenticado resolvido uma vez por requisição (middleware) e
+# compartilhado entre requisições por um cache LRU com TTL, indexado pelo uid.
+# As rotas que alteram usuários chamam invalidate_principal(); o TTL limita a
+# defasagem vista por outros workers.
+
+
+class Principal:
+    """Dados mínimos do usuário logado usados por rotas e templates."""
+
+    __slots__ = ("id", "name", "email", "role", "is_active")
+
+    def __init__(self, id: int, name: str, email: str, role: UserRole, is_active: bool):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[int, tuple[float, Optional[Principal]]]" = OrderedDict()
+
+
+def _fetch_principal(uid: int) -> Optional[Principal]:
+    db = ReadSessionLocal()
+    try:
+        row = (
+            db.query(User.id, User.name, User.email, User.role, User.is_active)
+            .filter(User.id == uid)
+            .first()
+        )
+    finally:
+        db.close()
+    return Principal(*row) if row else None
+
+
+def _cached_principal(uid: int) -> tuple[bool, Optional[Principal]]:
+    with _lock:
+        cached = _cache.get(uid)
+        if cached and cached[0] > time.monotonic():
+            _cache.move_to_end(uid)
+            return True, cached[1]
+    return False, None
+
+
+def load_principal(uid: int) -> Optional[Principal]:
+    hit, principal = _cached_principal(uid)
+    if hit:
+        return principal
+
+    now = time.monotonic()
+    principal = _fetch_principal(uid)
+
+    with _lock:
+        _cache[uid] = (now + settings.PRINCIPAL_CACHE_TTL_SECONDS, principal)
+        _cache.move_to_end(uid)
+        while len(_cache) > settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return principal
+
+
+def invalidate_principal(uid: int) -> None:
+    with _lock:
+        _cache.pop(uid, None)
+
+
+def session_uid(request: Request) -> Optional[int]:
+    session_data = get_session_data(request)
+    if not session_data:
+        return None
+    return session_data.get("uid")
+
+
+def _bind(request: Request, principal: Optional[Principal]) -> Optional[Principal]:
+    request.state.user = principal
+    request.scope["principal_resolved"] = True
+    return principal
+
+
+def resolve_principal(request: Request) -> Optional[Principal]:
+    """Usuário da requisição; consulta o cache só na primeira chamada."""
+    if "principal_resolved" in request.scope:
+        return request.state.user
+
+    uid = session_uid(request)
+    return _bind(request, load_principal(uid) if uid else None)
+
+
+async def resolve_principal_async(request: Request) -> Optional[Principal]:
+    """Como resolve_principal, mas leva a consulta ao banco para o threadpool."""
+    if "principal_resolved" in request.scope:
+        return request.state.user
+
+    uid = session_uid(request)
+    if not uid:
+        return _bind(request, None)
+
+    hit, principal = _cached_principal(uid)
+    if not hit:
+        principal = await run_in_threadpool(load_principal, uid)
+    return _bind(request, principal)
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Tuple
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from app.core.config import settings
+from app.services import catalog_cache, static_assets
+
+# Ambiente Jinja único do processo, compartilhado por main.py e pelos
+# routers: cada template é compilado uma vez, o bytecode fica em disco
+# (TEMPLATE_BYTECODE_DIR) e precompile() carrega tudo na inicialização.
+#
+# {% cache "nome", chave... %}...{% endcache %} guarda o HTML do bloco em
+# memória. A chave inclui catalog_cache.catalog_version(), então qualquer
+# escrita em materiais descarta os fragmentos; o TTL cobre escritas feitas
+# por outros workers.
+
+TEMPLATE_DIR = "templates"
+
+_lock = threading.Lock()
+_fragments: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+
+def _fragment_key(parts) -> Tuple:
+    return (catalog_cache.catalog_version(),) + tuple(
+        tuple(p) if isinstance(p, (list, set)) else p for p in parts
+    )
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render_cached", [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, parts, caller):
+        key = _fragment_key(parts)
+        now = time.monotonic()
+        with _lock:
+            cached = _fragments.get(key)
+            if cached and now - cached[0] < settings.FRAGMENT_CACHE_TTL_SECONDS:
+                _fragments.move_to_end(key)
+                return cached[1]
+
+        html = caller()
+        with _lock:
+            # Renderizado antes de uma invalidação concorrente: não guarda.
+            if key[0] == catalog_cache.catalog_version():
+                _fragments[key] = (now, html)
+                _fragments.move_to_end(key)
+                while len(_fragments) > settings.FRAGMENT_CACHE_MAX_ENTRIES:
+                    _fragments.popitem(last=False)
+        return html
+
+
+def clear_fragments() -> None:
+    with _lock:
+        _fragments.clear()
+
+
+def _build_templates() -> Jinja2Templates:
+    bytecode_dir = Path(settings.TEMPLATE_BYTECODE_DIR)
+    bytecode_dir.mkdir(parents=True, exist_ok=True)
+
+    templates = Jinja2Templates(directory=TEMPLATE_DIR)
+    env = templates.env
+    env.add_extension(FragmentCacheExtension)
+    env.bytecode_cache = FileSystemBytecodeCache(str(bytecode_dir))
+    env.auto_reload = settings.TEMPLATE_AUTO_RELOAD
+    env.globals["asset_url"] = static_assets.asset_url
+    return templates
+
+
+templates = _build_templates()
+
+
+def precompile() -> int:
+    """Compila todos os templates (e grava o bytecode) antes do 1º request."""
+    static_assets.load_manifest()
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
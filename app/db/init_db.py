@@ -1,6 +1,8 @@
 
 from datetime import datetime
 
+from sqlalchemy import inspect, text
+
 from app.db.session import engine, SessionLocal
 from app.db.base import Base
 from app.core.config import settings
@@ -9,10 +11,48 @@ from app.models.user import User, UserRole
 from app.models.material import Material
 from app.models.access_log import AccessLog
 from app.models.invite_token import InviteToken
+from app.models.blob import Blob
+from app.models.access_rollup import AccessRollupState
+from app.models.backup_config import BackupConfig
+from app.models.backup_job import BackupJob
+from app.services.search_service import ensure_search_index
+
+
+def ensure_columns(bind) -> None:
+    """Adiciona colunas anuláveis novas em tabelas que já existiam."""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present or not column.nullable:
+                continue
+            col_type = column.type.compile(dialect=bind.dialect)
+            statements.append(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}')
+
+    # Inspeção antes da transação: com o escritor único (pool de uma
+    # conexão) as duas não podem estar abertas ao mesmo tempo.
+    if statements:
+        with bind.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+
+
+def ensure_indexes(bind) -> None:
+    """Cria índices declarados depois que as tabelas já existiam."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
 
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    ensure_search_index(engine)
 
     db = SessionLocal()
     try:
@@ -0,0 +1,79 @@
+
+import os
+from collections import defaultdict
+from hashlib import sha256
+from pathlib import Path
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.models.material import Material, MaterialSourceType
+from app.services import blob_store
+
+
+def _hash_file(path: Path) -> tuple[str, int]:
+    hasher = sha256()
+    size = 0
+    with path.open("rb") as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def migrate() -> None:
+    """Move os uploads do diretório plano para o armazenamento por hash.
+
+    Idempotente: materiais que já apontam para um blob são ignorados. Vários
+    materiais com o mesmo file_path (uploads que se sobrescreveram) passam a
+    compartilhar o mesmo blob, com uma referência cada.
+    """
+    init_db()
+    db = SessionLocal()
+    try:
+        pending = (
+            db.query(Material)
+            .filter(
+                Material.source_type == MaterialSourceType.UPLOAD,
+                Material.file_path.isnot(None),
+                Material.file_sha256.is_(None),
+            )
+            .all()
+        )
+        by_path = defaultdict(list)
+        for material in pending:
+            by_path[material.file_path].append(material)
+
+        moved = missing = 0
+        for old_path, materials in by_path.items():
+            source = Path(old_path)
+            if not source.is_file():
+                missing += len(materials)
+                print(f"[MIGRAÇÃO] Arquivo ausente, mantido como está: {old_path}")
+                continue
+
+            digest, size = _hash_file(source)
+            dest = blob_store.blob_path(digest)
+            if dest.exists():
+                source.unlink()
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, dest)
+
+            for material in materials:
+                material.original_filename = material.original_filename or source.name
+                material.file_path = str(dest)
+                material.file_size = size
+                material.file_sha256 = digest
+                blob_store.acquire(db, digest, size)
+            # Commit por arquivo: o disco e o banco nunca divergem em mais de um item.
+            db.commit()
+            moved += len(materials)
+
+        print(f"[MIGRAÇÃO] Materiais migrados: {moved}; arquivos ausentes: {missing}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,19 +1,101 @@
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Callable, TypeVar
 
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.core import metrics
 from app.core.config import settings
 
 connect_args = {}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+# ------------------- Perfil de produção do SQLite -------------------
+#
+# Com DB_PROFILE=production (e um banco SQLite em arquivo):
+#   - WAL + synchronous=NORMAL: leitores não bloqueiam o escritor e vice-versa;
+#   - busy_timeout, mmap, cache e temp_store em memória em toda conexão;
+#   - um engine de escrita com uma única conexão (escritor único, sem
+#     SQLITE_BUSY entre conexões do próprio processo) e um engine somente
+#     leitura com pool próprio para as listagens.
+
+PRODUCTION_PROFILE = (
+    settings.DB_PROFILE == "production"
+    and settings.DATABASE_URL.startswith("sqlite")
+    and ":memory:" not in settings.DATABASE_URL
+)
+
+
+def _connection_pragmas() -> list[str]:
+    return [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        # valor negativo = tamanho em KiB
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+
+
+def _apply_write_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        for pragma in _connection_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _apply_read_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _connection_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def read_only_url(url: str) -> str:
+    """sqlite:///./x.db -> sqlite:///file:./x.db?mode=ro&uri=true"""
+    prefix, path = url.split(":///", 1)
+    return f"{prefix}:///file:{path}?mode=ro&uri=true"
+
+
+def _write_engine_kwargs() -> dict:
+    if not PRODUCTION_PROFILE:
+        return {}
+    return {"pool_size": 1, "max_overflow": 0, "pool_timeout": settings.DB_WRITE_POOL_TIMEOUT}
+
+
+def _read_engine_kwargs() -> dict:
+    return {"pool_size": settings.DB_READ_POOL_SIZE, "max_overflow": settings.DB_READ_POOL_OVERFLOW}
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
+    **_write_engine_kwargs(),
 )
 
+read_engine = engine
+if PRODUCTION_PROFILE:
+    event.listen(engine, "connect", _apply_write_pragmas)
+    read_engine = create_engine(
+        read_only_url(settings.DATABASE_URL),
+        connect_args=connect_args,
+        **_read_engine_kwargs(),
+    )
+    event.listen(read_engine, "connect", _apply_read_pragmas)
+
+metrics.instrument_engine(engine, "write")
+if read_engine is not engine:
+    metrics.instrument_engine(read_engine, "read")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def get_db():
@@ -22,3 +104,88 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ------------------- Modo assíncrono (DB_MODE=async) -------------------
+#
+# As rotas são async def e recebem a sessão por get_session: uma Session
+# síncrona (modo "sync") ou uma AsyncSession sobre aiosqlite (modo "async").
+# A lógica de consulta continua escrita no ORM síncrono e é executada por
+# run_db: no threadpool (sync) ou via AsyncSession.run_sync (async), sem
+# ocupar threads do pool durante o I/O do banco. init_db e o backup seguem
+# usando o engine síncrono acima.
+
+T = TypeVar("T")
+
+
+def async_database_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if settings.DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        connect_args=connect_args,
+        **_write_engine_kwargs(),
+    )
+    async_read_engine = async_engine
+    if PRODUCTION_PROFILE:
+        event.listen(async_engine.sync_engine, "connect", _apply_write_pragmas)
+        async_read_engine = create_async_engine(
+            async_database_url(read_only_url(settings.DATABASE_URL)),
+            connect_args=connect_args,
+            **_read_engine_kwargs(),
+        )
+        event.listen(async_read_engine.sync_engine, "connect", _apply_read_pragmas)
+
+    metrics.instrument_engine(async_engine.sync_engine, "async_write")
+    if async_read_engine is not async_engine:
+        metrics.instrument_engine(async_read_engine.sync_engine, "async_read")
+
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def _session_from(sync_factory, async_factory):
+    if async_factory is not None:
+        async with async_factory() as session:
+            yield session
+        return
+
+    db = sync_factory()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_session():
+    """Sessão de escrita (engine de escritor único no perfil de produção)."""
+    async for session in _session_from(SessionLocal, AsyncSessionLocal):
+        yield session
+
+
+async def get_read_session():
+    """Sessão para rotas que só leem (listagens)."""
+    async for session in _session_from(ReadSessionLocal, AsyncReadSessionLocal):
+        yield session
+
+
+async def run_db(db: Any, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa ``fn(session, *args)`` sem bloquear o event loop.
+
+    ``fn`` deve conter só trabalho de banco: no modo async ela roda na
+    thread do event loop.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
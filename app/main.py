@@ -1,28 +1,30 @@
 
 from fastapi import Depends, FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, Response
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
 
+from app.core import password_hashing
 from app.core.config import settings
-from app.core.security import get_session_data
-from app.db.session import engine, get_db, SessionLocal
+from app.core.templating import precompile, templates
+from app.db.session import engine, get_read_session, run_db
 from app.db.base import Base
+from app.db.init_db import ensure_columns, ensure_indexes
+from app.middleware.auth_context import AuthContextMiddleware
+from app.middleware.body_limit import MULTIPART_OVERHEAD_BYTES, BodyLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
 from app.middleware.security_headers import SecurityHeadersMiddleware
-from app.models.user import User
-from app.models.material import Material
-from app.models.backup_config import BackupConfig
-from app.services.backup_service import create_backup
+from app.services import access_analytics, access_log_writer, backup_jobs, catalog_cache, listings, page_cache, static_assets
+from app.services.search_service import ensure_search_index
 
 import asyncio
-from datetime import datetime
 
 
 # Garante que as tabelas existam (para execução em ambiente simples).
 Base.metadata.create_all(bind=engine)
+ensure_columns(engine)
+ensure_indexes(engine)
+ensure_search_index(engine)
 
 app = FastAPI(title=settings.APP_NAME)
 
@@ -34,117 +36,149 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(SecurityHeadersMiddleware)
+STATIC_PREFIXES = ("/static/",)
+
+app.add_middleware(SecurityHeadersMiddleware, static_prefixes=STATIC_PREFIXES)
+app.add_middleware(AuthContextMiddleware, skip_prefixes=STATIC_PREFIXES)
+# Antes do parser de multipart: uploads acima do limite nem chegam ao disco
+app.add_middleware(BodyLimitMiddleware, max_bytes=settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+if settings.METRICS_ENABLED:
+    # Mais externo: a latência medida inclui os outros middlewares
+    app.add_middleware(
+        MetricsMiddleware,
+        static_prefixes=STATIC_PREFIXES,
+        server_timing=settings.SERVER_TIMING_HEADER,
+    )
+
+@app.on_event("startup")
+async def precompile_templates():
+    await run_in_threadpool(precompile)
+
+
+@app.on_event("startup")
+async def start_password_hashing():
+    await run_in_threadpool(password_hashing.start)
+
+
+@app.on_event("shutdown")
+async def stop_password_hashing():
+    await run_in_threadpool(password_hashing.shutdown)
+
+
+@app.on_event("startup")
+async def start_access_log_writer():
+    access_log_writer.start()
 
 
-class AuthContextMiddleware(BaseHTTPMiddleware):
-    """Carrega usuário logado em request.state.user para uso nos templates."""
+@app.on_event("shutdown")
+async def stop_access_log_writer():
+    # Grava os logs de acesso ainda na fila antes de encerrar
+    await run_in_threadpool(access_log_writer.stop)
 
-    async def dispatch(self, request, call_next):
-        request.state.user = None
-        from app.db.session import SessionLocal
-        db = SessionLocal()
-        try:
-            session_data = get_session_data(request)
-            if session_data:
-                uid = session_data.get("uid")
-                if uid:
-                    user = db.query(User).filter(User.id == uid).first()
-                    request.state.user = user
-        except Exception:
-            pass
-        finally:
-            db.close()
-        response = await call_next(request)
-        return response
 
+@app.on_event("startup")
+async def start_access_rollup_loop():
+    interval = settings.ACCESS_ROLLUP_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+
+    async def rollup_loop():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(access_analytics.run_incremental)
+            except Exception as exc:
+                print(f"[ANÁLISES] Falha na agregação dos acessos: {exc}")
+
+    asyncio.create_task(rollup_loop())
 
-app.add_middleware(AuthContextMiddleware)
 
 @app.on_event("startup")
 async def start_backup_loop():
+    # O backup roda na thread de backup_jobs; o laço só enfileira.
+    await run_in_threadpool(backup_jobs.start)
+
     async def backup_loop():
         while True:
-            db = SessionLocal()
             try:
-                cfg = db.query(BackupConfig).first()
-                if cfg and cfg.enabled:
-                    now = datetime.utcnow()
-                    due = (
-                        not cfg.last_run_at
-                        or (now - cfg.last_run_at).total_seconds() >= cfg.interval_hours * 3600
-                    )
-                    if due:
-                        backup_name = create_backup()
-                        cfg.last_run_at = now
-                        db.add(cfg)
-                        db.commit()
-                        print(f"[BACKUP] Executado automaticamente: {backup_name}")
-            finally:
-                db.close()
+                await run_in_threadpool(backup_jobs.schedule_if_due)
+            except Exception as exc:
+                print(f"[BACKUP] Falha ao agendar backup automático: {exc}")
 
             await asyncio.sleep(60)  # checa a cada 60s
 
     asyncio.create_task(backup_loop())
 
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# static/dist (gerado por app.services.static_assets): .gz e cache immutable
+app.mount("/static", static_assets.PrecompressedStaticFiles(directory="static"), name="static")
 
-templates = Jinja2Templates(directory="templates")
+HOME_PAGE_SIZE = 20
 
 
 @app.get("/", response_class=HTMLResponse)
-def home(
+async def home(
     request: Request,
     q: str | None = None,
     types: str | None = None,
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    db=Depends(get_read_session),
 ):
-    query = db.query(Material).filter(Material.is_active == True)
-
-    if q:
-        like = f"%{q.strip()}%"
-        query = query.filter(
-            (Material.title.ilike(like)) | (Material.description.ilike(like))
-        )
-
-    if types:
-        selected = [t for t in types.split(",") if t]
-        if selected:
-            query = query.filter(Material.type.in_(selected))
-
-    materials = query.order_by(Material.created_at.desc()).limit(20).all()
-    total_items = query.count()
-
-    # Mapeia dados mínimos para o template
-    view_models = []
-    for m in materials:
-        view_models.append({
-            "id": m.id,
-            "title": m.title,
-            "description": m.description or "",
-            "type": m.type.value,
-            "author_name": m.author.name if m.author else "Desconhecido",
-            "created_at": m.created_at,
-        })
-
-    return templates.TemplateResponse(
+    # A página (consultas, caixa de busca e links) sai só dos valores
+    # normalizados da chave, nunca da URL crua: o corpo guardado no cache
+    # é o mesmo para qualquer visitante com a mesma chave.
+    key = page_cache.home_key(q, types, cursor)
+    search, selected, _ = key
+    types = ",".join(selected)
+    page_params = {k: v for k, v in (("q", search), ("types", types)) if v}
+
+    # Visitantes anônimos: página inteira do cache, com ETag/304
+    anonymous = request.state.user is None
+    if anonymous:
+        cached = page_cache.get(key)
+        if cached:
+            return _cached_home_response(request, cached)
+        version = catalog_cache.catalog_version()
+
+    facets, total_items, page = await run_db(
+        db, listings.catalog_page, search or None, types or None, cursor, HOME_PAGE_SIZE
+    )
+
+    # Linhas projetadas: só as colunas que o template usa
+    view_models = listings.material_rows(page.items)
+
+    response = templates.TemplateResponse(
         "home.html",
         {
             "request": request,
             "materials": view_models,
             "total_items": total_items,
-            "page": 1,
-            "q": q or "",
-            "types": types or "",
+            "facets": facets,
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+            "q": search,
+            "types": types,
+            "page_params": page_params,
         },
     )
+    if anonymous:
+        return _cached_home_response(request, page_cache.put(key, version, response.body))
+    return response
+
+
+def _cached_home_response(request: Request, cached: page_cache.CachedPage) -> Response:
+    # no-cache: o navegador guarda, mas revalida pelo ETag a cada visita.
+    headers = {"etag": cached.etag, "cache-control": "no-cache", "vary": "Cookie"}
+    if page_cache.not_modified(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(cached.body, headers=headers)
 
 
-from app.routes import admin, auth, materials, students
+from app.routes import admin, api, auth, materials, students
 
 # Rotas especializadas
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(materials.router, prefix="/materials", tags=["materials"])
 app.include_router(students.router, prefix="/students", tags=["students"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(api.router, prefix="/api/v1", tags=["api"])
@@ -0,0 +1,27 @@
+
+from typing import Iterable
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.principal import resolve_principal_async
+
+
+class AuthContextMiddleware:
+    """Carrega usuário logado em request.state.user para uso nos templates."""
+
+    def __init__(self, app: ASGIApp, skip_prefixes: Iterable[str] = ()):
+        self.app = app
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            request = Request(scope)
+            request.state.user = None
+            # Arquivos estáticos não usam o usuário: evita a consulta.
+            if not (self.skip_prefixes and scope["path"].startswith(self.skip_prefixes)):
+                try:
+                    await resolve_principal_async(request)
+                except Exception:
+                    pass
+        await self.app(scope, receive, send)
@@ -0,0 +1,48 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.upload_service import too_large
+
+# Campos do formulário e delimitadores do multipart, além do arquivo em si.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class BodyLimitMiddleware:
+    """Recusa com 413 corpos acima de ``max_bytes`` antes de o Starlette
+    interpretar o multipart (e gravar as partes em temporários).
+
+    Com Content-Length, a resposta sai sem ler nada do corpo; sem ele
+    (chunked), os bytes são contados conforme chegam.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    error = too_large()
+                    response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Repassada pelo FastAPI ao ler o formulário: vira o 413 normal
+                    raise too_large()
+            return message
+
+        await self.app(scope, receive_limited, send)
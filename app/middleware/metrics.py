@@ -0,0 +1,81 @@
+import time
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+
+
+def _route_label(scope: Scope, static_prefixes: tuple) -> str:
+    # Preenchido pelo roteador do FastAPI ao casar a rota
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    if static_prefixes and scope["path"].startswith(static_prefixes):
+        return "static"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Latência, requisições em andamento, bytes e SQL por rota, mais o
+    cabeçalho Server-Timing (app e db) em cada resposta."""
+
+    def __init__(self, app: ASGIApp, static_prefixes: Iterable[str] = (), server_timing: bool = True):
+        self.app = app
+        self.static_prefixes = tuple(static_prefixes)
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        received = 0
+        sent = 0
+        status = 500
+
+        async def receive_counting() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    value = (
+                        f'app;dur={elapsed_ms:.1f}, '
+                        f'db;desc="{stats.sql_count} queries";dur={stats.sql_seconds * 1000:.1f}, '
+                        f'pool;dur={stats.pool_wait_seconds * 1000:.1f}'
+                    )
+                    message["headers"] = list(message.get("headers", ())) + [
+                        (b"server-timing", value.encode())
+                    ]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_counting, send_with_timing)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            metrics.current_request.reset(token)
+            route = _route_label(scope, self.static_prefixes)
+            method = scope["method"]
+            metrics.REQUEST_DURATION.observe(
+                time.perf_counter() - started, route=route, method=method, status=str(status)
+            )
+            metrics.REQUEST_SQL_STATEMENTS.observe(stats.sql_count, route=route, method=method)
+            if received:
+                metrics.REQUEST_BYTES.inc(received, route=route, method=method)
+            if sent:
+                metrics.RESPONSE_BYTES.inc(sent, route=route, method=method)
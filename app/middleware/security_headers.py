@@ -1,12 +1,41 @@
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Iterable
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    # Middleware simples para reforçar cabeçalhos de segurança.
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
-        return response
+# Pares (nome, valor) já em bytes, como o ASGI espera.
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+)
+
+
+class SecurityHeadersMiddleware:
+    # Middleware ASGI puro para reforçar cabeçalhos de segurança.
+
+    def __init__(self, app: ASGIApp, static_prefixes: Iterable[str] = ()):
+        self.app = app
+        self.static_prefixes = tuple(static_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Respostas estáticas nunca definem esses cabeçalhos: anexa direto,
+        # sem procurar duplicatas.
+        is_static = bool(self.static_prefixes) and scope["path"].startswith(self.static_prefixes)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if is_static:
+                    headers.extend(SECURITY_HEADERS)
+                else:
+                    present = {name.lower() for name, _ in headers}
+                    headers.extend(h for h in SECURITY_HEADERS if h[0] not in present)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,76 @@
+
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, Integer, String
+
+from app.db.base import Base
+
+# Agregados de access_logs mantidos por app.services.access_analytics.
+# Os dias são em UTC (accessed_at é gravado com utcnow).
+#
+# As tabelas *_users guardam cada par (chave, usuário) já visto, com o id do
+# primeiro log que o trouxe; é delas que sai a contagem de usuários únicos
+# sem reler os logs antigos.
+
+
+class AccessRollupState(Base):
+    """Marca d'água: último AccessLog.id já agregado."""
+
+    __tablename__ = "access_rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    last_log_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MaterialDailyAccess(Base):
+    __tablename__ = "access_daily_material"
+
+    day = Column(Date, primary_key=True)
+    material_id = Column(Integer, primary_key=True, index=True)
+    access_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+
+class AuthorDailyAccess(Base):
+    __tablename__ = "access_daily_author"
+
+    day = Column(Date, primary_key=True)
+    author_id = Column(Integer, primary_key=True, index=True)
+    access_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+
+class MaterialAccessTotal(Base):
+    __tablename__ = "access_material_totals"
+
+    material_id = Column(Integer, primary_key=True)
+    access_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+    last_accessed_at = Column(DateTime, nullable=True)
+
+
+class MaterialDailyUser(Base):
+    __tablename__ = "access_daily_material_users"
+
+    day = Column(Date, primary_key=True)
+    material_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    first_log_id = Column(Integer, nullable=False, index=True)
+
+
+class AuthorDailyUser(Base):
+    __tablename__ = "access_daily_author_users"
+
+    day = Column(Date, primary_key=True)
+    author_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    first_log_id = Column(Integer, nullable=False, index=True)
+
+
+class MaterialUser(Base):
+    __tablename__ = "access_material_users"
+
+    material_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    first_log_id = Column(Integer, nullable=False, index=True)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Float, ForeignKey, Integer, String, Text
+
+from app.db.base import Base
+
+
+class BackupJobState(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class BackupJob(Base):
+    __tablename__ = "backup_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "backup" (cria snapshot) ou "verify" (confere snapshot_name)
+    kind = Column(String(20), nullable=True, default="backup")
+    # "manual" (tela de backup) ou "scheduled" (backup automático)
+    trigger = Column(String(20), nullable=False, default="manual")
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    state = Column(SAEnum(BackupJobState), nullable=False, default=BackupJobState.QUEUED, index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    phase = Column(String(50), nullable=True)
+    snapshot_name = Column(String(100), nullable=True)
+    error = Column(Text, nullable=True)
+    # Resumo em JSON (ex.: resultado da verificação)
+    result = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Processo que executa o job ("host:pid:token") e último sinal de vida;
+    # a recuperação só falha jobs de processos mortos ou sem sinal recente.
+    owner = Column(String(120), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
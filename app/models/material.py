@@ -3,11 +3,13 @@ from datetime import datetime
 from enum import Enum
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Enum as SAEnum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -29,6 +31,11 @@ class MaterialSourceType(str, Enum):
 
 class Material(Base):
     __tablename__ = "materials"
+    __table_args__ = (
+        # Suportam a paginação por cursor (created_at, id) da home e do dashboard.
+        Index("ix_materials_active_created_id", "is_active", "created_at", "id"),
+        Index("ix_materials_author_active_created_id", "author_id", "is_active", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
@@ -36,6 +43,10 @@ class Material(Base):
     type = Column(SAEnum(MaterialType), nullable=False, index=True)
     source_type = Column(SAEnum(MaterialSourceType), nullable=False)
     file_path = Column(String(512), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    file_sha256 = Column(String(64), nullable=True, index=True)
+    # Nome enviado pelo usuário, usado no Content-Disposition do download
+    original_filename = Column(String(255), nullable=True)
     external_url = Column(String(512), nullable=True)
     is_active = Column(Boolean, default=True)
 
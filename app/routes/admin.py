@@ -1,26 +1,62 @@
-from fastapi import APIRouter, Depends, Request, Form, status
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, status
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
+from app.core import metrics, password_hashing
 from app.core.dependencies import require_admin
-from app.core.security import hash_password
-from app.db.session import get_db
+from app.core.principal import Principal, invalidate_principal
+from app.core.templating import templates
+from app.db.session import get_read_session, get_session, run_db
 from app.models.user import User, UserRole
 from app.models.backup_config import BackupConfig
-from app.services.backup_service import create_backup
+from app.services import access_log_writer, backup_jobs, backup_restore, catalog_cache, listings
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+
+
+def _get_user(db: Session, user_id: int) -> User | None:
+    return db.query(User).filter(User.id == user_id).first()
+
+
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+
+
+def _load_backup_config(db: Session) -> BackupConfig:
+    cfg = db.query(BackupConfig).first()
+    if not cfg:
+        cfg = BackupConfig(enabled=False, interval_hours=24)
+        db.add(cfg)
+        db.commit()
+        db.refresh(cfg)
+    return cfg
+
+
+def _save_backup_config(db: Session, enabled: bool, interval_hours: int) -> BackupConfig:
+    cfg = db.query(BackupConfig).first()
+    if not cfg:
+        cfg = BackupConfig()
+        db.add(cfg)
+
+    cfg.enabled = enabled
+    cfg.interval_hours = max(1, interval_hours)  # pelo menos 1h
+    db.commit()
+    db.refresh(cfg)
+    return cfg
 
 
 @router.get("/users", response_class=HTMLResponse)
-def list_users(
+async def list_users(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    users = db.query(User).order_by(User.created_at.desc()).all()
+    users = await run_db(db, listings.user_rows)
     return templates.TemplateResponse(
         "admin/users.html",
         {"request": request, "users": users},
@@ -28,9 +64,9 @@ def list_users(
 
 
 @router.get("/users/new", response_class=HTMLResponse)
-def new_user_form(
+async def new_user_form(
     request: Request,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     return templates.TemplateResponse(
         "admin/user_form.html",
@@ -39,62 +75,63 @@ def new_user_form(
 
 
 @router.post("/users/new", response_class=HTMLResponse)
-def create_user(
+async def create_user(
     request: Request,
     name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     role: str = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_session),
+    read_db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
 ):
     email = email.strip().lower()
-    existing = db.query(User).filter(User.email == email).first()
-    if existing:
+    try:
+        role_enum = UserRole(role)
+    except ValueError:
         return templates.TemplateResponse(
             "admin/user_form.html",
             {
                 "request": request,
-                "error": "Já existe um usuário com esse e-mail.",
+                "error": "Papel inválido.",
                 "user": {"name": name, "email": email, "role": role},
             },
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    try:
-        role_enum = UserRole(role)
-    except ValueError:
+    existing = await run_db(read_db, _get_user_by_email, email)
+    if existing:
         return templates.TemplateResponse(
             "admin/user_form.html",
             {
                 "request": request,
-                "error": "Papel inválido.",
+                "error": "Já existe um usuário com esse e-mail.",
                 "user": {"name": name, "email": email, "role": role},
             },
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
+    password_hash = await password_hashing.hash_password(password)
     user = User(
         name=name.strip(),
         email=email,
-        password_hash=hash_password(password),
+        password_hash=password_hash,
         role=role_enum,
         is_active=True,
     )
-    db.add(user)
-    db.commit()
+    await run_db(db, _save_user, user)
 
     return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/users/{user_id}/edit", response_class=HTMLResponse)
-def edit_user_form(
+async def edit_user_form(
     request: Request,
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await run_db(db, _get_user, user_id)
     if not user:
         return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -105,22 +142,23 @@ def edit_user_form(
 
 
 @router.post("/users/{user_id}/edit", response_class=HTMLResponse)
-def update_user(
+async def update_user(
     request: Request,
     user_id: int,
     name: str = Form(...),
     email: str = Form(...),
     role: str = Form(...),
     password: str | None = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_session),
+    read_db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await run_db(read_db, _get_user, user_id)
     if not user:
         return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
     email = email.strip().lower()
-    email_owner = db.query(User).filter(User.email == email).first()
+    email_owner = await run_db(read_db, _get_user_by_email, email)
     if email_owner and email_owner.id != user.id:
         return templates.TemplateResponse(
             "admin/user_form.html",
@@ -145,33 +183,43 @@ def update_user(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
+    password_hash = await password_hashing.hash_password(password) if password else None
+
+    user = await run_db(db, _get_user, user_id)
+    if not user:
+        return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
+
+    renamed = user.name != name.strip()
     user.name = name.strip()
     user.email = email
     user.role = role_enum
 
-    if password:
-        user.password_hash = hash_password(password)
+    if password_hash:
+        user.password_hash = password_hash
 
-    db.add(user)
-    db.commit()
+    await run_db(db, _save_user, user)
+    invalidate_principal(user_id)
+    if renamed:
+        # Nome do autor aparece nos cards em cache
+        catalog_cache.invalidate()
 
     return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.post("/users/{user_id}/toggle-active")
-def toggle_user_active(
+async def toggle_user_active(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await run_db(db, _get_user, user_id)
     if not user:
         return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
     # Soft delete / reativação
     user.is_active = not user.is_active
-    db.add(user)
-    db.commit()
+    await run_db(db, _save_user, user)
+    invalidate_principal(user_id)
 
     return RedirectResponse(url="/admin/users", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -179,52 +227,112 @@ def toggle_user_active(
 # ------------------- Backup config -------------------
 
 
+def _load_backup_page(db: Session) -> tuple[BackupConfig, list]:
+    return _load_backup_config(db), backup_jobs.recent_jobs(db)
+
+
 @router.get("/backup", response_class=HTMLResponse)
-def backup_config_get(
+async def backup_config_get(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    cfg = db.query(BackupConfig).first()
-    if not cfg:
-        cfg = BackupConfig(enabled=False, interval_hours=24)
-        db.add(cfg)
-        db.commit()
-        db.refresh(cfg)
+    cfg, jobs = await run_db(db, _load_backup_page)
 
     return templates.TemplateResponse(
         "admin/backup.html",
-        {"request": request, "config": cfg, "message": None},
+        {"request": request, "config": cfg, "jobs": jobs, "message": None},
     )
 
 
 @router.post("/backup", response_class=HTMLResponse)
-def backup_config_post(
+async def backup_config_post(
     request: Request,
     enabled: bool | None = Form(False),
     interval_hours: int = Form(24),
     run_now: bool | None = Form(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_admin),
 ):
-    cfg = db.query(BackupConfig).first()
-    if not cfg:
-        cfg = BackupConfig()
-        db.add(cfg)
-
-    cfg.enabled = bool(enabled)
-    cfg.interval_hours = max(1, interval_hours)  # pelo menos 1h
-
     message = "Configuração salva."
+    busy = False
+
+    cfg = await run_db(db, _save_backup_config, bool(enabled), interval_hours)
 
     if run_now:
-        backup_name = create_backup()
-        message = f"Backup executado manualmente: {backup_name}"
+        # Só enfileira; o progresso é acompanhado pela própria página.
+        job, created = await run_db(db, backup_jobs.submit, "manual", current_user.id)
+        message = f"Backup #{job.id} na fila de execução." if created else _busy_message(job)
+        busy = not created
 
-    db.commit()
-    db.refresh(cfg)
+    jobs = await run_db(db, backup_jobs.recent_jobs)
+
+    return templates.TemplateResponse(
+        "admin/backup.html",
+        {"request": request, "config": cfg, "jobs": jobs, "message": message, "busy": busy},
+    )
+
+
+def _busy_message(job) -> str:
+    kind = "Verificação" if job.kind == "verify" else "Backup"
+    return f"Pedido não enfileirado: {kind} #{job.id} ainda em andamento. Tente de novo quando terminar."
+
+
+@router.post("/backup/verify", response_class=HTMLResponse)
+async def backup_verify(
+    request: Request,
+    snapshot_name: str = Form(...),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_admin),
+):
+    try:
+        backup_restore.snapshot_dir(snapshot_name)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+    job, created = await run_db(db, backup_jobs.submit, "manual", current_user.id, "verify", snapshot_name)
+    message = f"Verificação #{job.id} de {snapshot_name} na fila de execução." if created else _busy_message(job)
+    cfg, jobs = await run_db(db, _load_backup_page)
 
     return templates.TemplateResponse(
         "admin/backup.html",
-        {"request": request, "config": cfg, "message": message},
+        {"request": request, "config": cfg, "jobs": jobs, "message": message, "busy": not created},
     )
+
+
+@router.get("/backup/jobs")
+async def backup_jobs_list(
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
+):
+    return await run_db(db, backup_jobs.recent_jobs)
+
+
+@router.get("/backup/jobs/{job_id}")
+async def backup_job_status(
+    job_id: int,
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_admin),
+):
+    job = await run_db(db, backup_jobs.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job de backup não encontrado.")
+    return job
+
+
+# ------------------- Logs de acesso -------------------
+
+
+@router.get("/access-log/stats")
+async def access_log_stats(current_user: Principal = Depends(require_admin)):
+    """Profundidade da fila e latência de gravação dos lotes de logs de acesso."""
+    return access_log_writer.stats()
+
+
+# ------------------- Métricas -------------------
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint(current_user: Principal = Depends(require_admin)):
+    """Métricas do processo no formato texto do Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
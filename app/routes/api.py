@@ -0,0 +1,103 @@
+import json
+from datetime import datetime
+from hashlib import sha256
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+
+from app.core.dependencies import get_current_user
+from app.core.principal import Principal
+from app.db.session import get_read_session, run_db
+from app.services import listings, page_cache
+
+try:  # serialização mais rápida quando disponível
+    import orjson
+except ImportError:
+    orjson = None
+
+router = APIRouter()
+
+# API JSON para clientes (quiosque, app): mesmas consultas da home, com
+# seleção de campos (?fields=id,title), cursor e ETag/304 pelo hash do corpo.
+
+LIST_FIELDS = ("id", "title", "description", "type", "author_name", "created_at")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def _dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def _json_response(request: Request, payload) -> Response:
+    body = _dumps(payload)
+    etag = f'"{sha256(body).hexdigest()[:32]}"'
+    headers = {"etag": etag, "cache-control": "private, no-cache"}
+    if page_cache.not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    if not fields:
+        return allowed
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in allowed]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(unknown)}. Disponíveis: {', '.join(allowed)}.",
+        )
+    return selected
+
+
+@router.get("/materials")
+async def list_materials(
+    request: Request,
+    q: Optional[str] = None,
+    types: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: Optional[str] = None,
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    selected = _parse_fields(fields, LIST_FIELDS)
+    facets, total_items, page = await run_db(db, listings.catalog_page, q, types, cursor, limit)
+
+    items = [
+        {f: getattr(row, f) for f in selected}
+        for row in listings.material_rows(page.items)
+    ]
+    return _json_response(request, {
+        "items": items,
+        "total": total_items,
+        "facets": facets,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    })
+
+
+@router.get("/materials/{material_id}")
+async def material_metadata(
+    request: Request,
+    material_id: int,
+    fields: Optional[str] = None,
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    metadata = await run_db(db, listings.material_metadata, material_id)
+    if metadata is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Material não encontrado.")
+
+    selected = _parse_fields(fields, tuple(metadata))
+    return _json_response(request, {f: metadata[f] for f in selected})
@@ -1,38 +1,84 @@
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Form, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.security import clear_session_cookie, create_session_cookie, verify_password
-from app.db.session import get_db
+from app.core import password_hashing
+from app.core.security import clear_session_cookie, create_session_cookie
+from app.core.templating import templates
+from app.db.session import SessionLocal, get_read_session, get_session, run_db
 from app.models.user import User
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+
+
+def _find_active_user(db: Session, email: str) -> User | None:
+    return (
+        db.query(User)
+        .filter(User.email == email, User.is_active == True)
+        .first()
+    )
+
+
+def _record_login(db: Session, user_id: int, ip: str | None, user_agent: str) -> None:
+    db.query(User).filter(User.id == user_id).update(
+        {
+            User.last_login_at: datetime.utcnow(),
+            User.last_login_ip: ip,
+            User.last_login_ua: user_agent,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def _replace_password_hash(user_id: int, old_hash: str, new_hash: str) -> None:
+    db = SessionLocal()
+    try:
+        # Só troca se a senha não mudou nesse meio-tempo.
+        db.query(User).filter(User.id == user_id, User.password_hash == old_hash).update(
+            {User.password_hash: new_hash}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _upgrade_password_hash(user_id: int, password: str, old_hash: str) -> None:
+    """Refaz o hash com os parâmetros atuais do CryptContext, depois da resposta."""
+    try:
+        new_hash = await password_hashing.hash_password(password)
+    except HTTPException:
+        return  # pool ocupado: fica para o próximo login
+    await run_in_threadpool(_replace_password_hash, user_id, old_hash, new_hash)
 
 
 @router.get("/login", response_class=HTMLResponse)
-def login_get(request: Request):
+async def login_get(request: Request):
     return templates.TemplateResponse("login.html", {"request": request, "error": None})
 
 
 @router.post("/login", response_class=HTMLResponse)
-def login_post(
+async def login_post(
     request: Request,
+    background_tasks: BackgroundTasks,
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db),
+    read_db=Depends(get_read_session),
+    db=Depends(get_session),
 ):
-    user = (
-        db.query(User)
-        .filter(User.email == email, User.is_active == True)
-        .first()
-    )
+    # Busca e verificação da senha fora da conexão de escrita; o hash roda
+    # no pool de processos (503 se estiver saturado)
+    user = await run_db(read_db, _find_active_user, email)
+
+    valid, needs_update = False, False
+    if user:
+        valid, needs_update = await password_hashing.verify_password(password, user.password_hash)
 
-    if not user or not verify_password(password, user.password_hash):
+    if not valid:
         # Mensagem genérica para evitar enumeração de usuários
         return templates.TemplateResponse(
             "login.html",
@@ -41,19 +87,25 @@ def login_post(
         )
 
     # Atualiza metadados de login
-    user.last_login_at = datetime.utcnow()
-    user.last_login_ip = request.client.host if request.client else None
-    user.last_login_ua = request.headers.get("user-agent", "")[:255]
-    db.add(user)
-    db.commit()
+    await run_db(
+        db,
+        _record_login,
+        user.id,
+        request.client.host if request.client else None,
+        request.headers.get("user-agent", "")[:255],
+    )
+
+    if needs_update:
+        background_tasks.add_task(_upgrade_password_hash, user.id, password, user.password_hash)
 
     response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
+    response.background = background_tasks
     create_session_cookie({"uid": user.id, "role": user.role.value}, response)
     return response
 
 
 @router.get("/logout")
-def logout():
+async def logout():
     response = RedirectResponse(url="/auth/login", status_code=status.HTTP_302_FOUND)
     clear_session_cookie(response)
     return response
@@ -1,6 +1,5 @@
 
 import os
-from pathlib import Path
 from typing import Optional
 
 from fastapi import (
@@ -13,48 +12,132 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import require_professor_or_admin, get_current_user
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.core.pagination import SortKey, paginate
+from app.core.templating import templates
+from app.db.session import get_read_session, get_session, run_db
 from app.models.material import Material, MaterialSourceType, MaterialType
-from app.models.access_log import AccessLog
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.services import access_analytics, access_log_writer, blob_store, catalog_cache, download_service, listings, search_service
+from app.services.upload_service import UPLOAD_DIR
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
-UPLOAD_DIR = Path("uploads/materials")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+DASHBOARD_PAGE_SIZE = 24
+
+
+def _load_dashboard(db: Session, current_user: Principal, cursor: Optional[str]):
+    query = listings.material_listing(db)
+    if current_user.role != UserRole.ADMIN:
+        query = query.filter(Material.author_id == current_user.id)
+
+    return paginate(
+        query,
+        [SortKey(Material.created_at), SortKey(Material.id)],
+        cursor,
+        DASHBOARD_PAGE_SIZE,
+    )
+
+
+def _get_active_material(db: Session, material_id: int) -> Optional[Material]:
+    return (
+        db.query(Material)
+        .filter(Material.id == material_id, Material.is_active == True)
+        .first()
+    )
+
+
+def _save_material(db: Session, material: Material) -> None:
+    db.add(material)
+    db.flush()
+    search_service.index_material(db, material)
+    db.commit()
+
+
+def _create_material(db: Session, material: Material) -> None:
+    if material.file_sha256:
+        blob_store.acquire(db, material.file_sha256, material.file_size)
+    _save_material(db, material)
+
+
+def _update_material(db: Session, material_id: int, changes: dict) -> None:
+    material = _get_active_material(db, material_id)
+    if not material:
+        return
+    if "file_sha256" in changes and changes["file_sha256"] != material.file_sha256:
+        blob_store.release(db, material.file_sha256)
+        if changes["file_sha256"]:
+            blob_store.acquire(db, changes["file_sha256"], changes["file_size"])
+    for field, value in changes.items():
+        setattr(material, field, value)
+    _save_material(db, material)
+
+
+def _deactivate_material(db: Session, material: Material) -> None:
+    material.is_active = False
+    db.add(material)
+    search_service.remove_material(db, material.id)
+    db.commit()
+
 
 @router.get("/dashboard", response_class=HTMLResponse)
-def dashboard(
+async def dashboard(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Dashboard: lista materiais do usuário (professor) ou todos (admin).
     """
-    query = db.query(Material).filter(Material.is_active == True)
-    if current_user.role != UserRole.ADMIN:
-        query = query.filter(Material.author_id == current_user.id)
-
-    materials = query.order_by(Material.created_at.desc()).all()
+    page = await run_db(db, _load_dashboard, current_user, cursor)
 
     return templates.TemplateResponse(
         "dashboard.html",
-        {"request": request, "materials": materials},
+        {
+            "request": request,
+            "materials": listings.material_rows(page.items),
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        },
+    )
+
+
+ANALYTICS_PERIODS = (7, 30, 90)
+
+
+@router.get("/analytics", response_class=HTMLResponse)
+async def analytics(
+    request: Request,
+    days: int = 30,
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
+):
+    """
+    Acessos por dia, por material e por autor, lidos só dos rollups.
+    Professores veem apenas os próprios materiais.
+    """
+    if days not in ANALYTICS_PERIODS:
+        days = 30
+    author_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    data = await run_db(db, access_analytics.load_analytics, author_id, days)
+
+    return templates.TemplateResponse(
+        "materials/analytics.html",
+        {"request": request, "days": days, "periods": ANALYTICS_PERIODS, **data},
     )
 
 
 @router.get("/new", response_class=HTMLResponse)
-def new_material_form(
+async def new_material_form(
     request: Request,
-    current_user: User = Depends(require_professor_or_admin),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
     return templates.TemplateResponse(
         "materials/form.html",
@@ -63,7 +146,7 @@ def new_material_form(
 
 
 @router.post("/new")
-def create_material(
+async def create_material(
     request: Request,
     title: str = Form(...),
     description: str = Form(""),
@@ -71,8 +154,8 @@ def create_material(
     source_type: str = Form(...),
     external_url: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
     # Validação básica de tipo
     try:
@@ -85,18 +168,13 @@ def create_material(
     except ValueError:
         raise HTTPException(status_code=400, detail="Origem de material inválida.")
 
-    file_path = None
+    stored = None
     url = None
 
     if src_type == MaterialSourceType.UPLOAD:
         if not file:
             raise HTTPException(status_code=400, detail="Arquivo obrigatório para upload.")
-        filename = file.filename or "material"
-        safe_name = filename.replace("..", "_").replace("/", "_")
-        dest = UPLOAD_DIR / safe_name
-        with dest.open("wb") as f:
-            f.write(file.file.read())
-        file_path = str(dest)
+        stored = await blob_store.store_upload(db, file)
     else:
         if not external_url:
             raise HTTPException(status_code=400, detail="URL obrigatória para material externo.")
@@ -107,28 +185,27 @@ def create_material(
         description=description.strip() if description else "",
         type=mat_type,
         source_type=src_type,
-        file_path=file_path,
+        file_path=str(stored.path) if stored else None,
+        file_size=stored.size if stored else None,
+        file_sha256=stored.sha256 if stored else None,
+        original_filename=stored.original_filename if stored else None,
         external_url=url,
         author_id=current_user.id,
     )
-    db.add(material)
-    db.commit()
+    await run_db(db, _create_material, material)
+    catalog_cache.invalidate()
 
     return RedirectResponse(url="/materials/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/{material_id}/edit", response_class=HTMLResponse)
-def edit_material_form(
+async def edit_material_form(
     request: Request,
     material_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    material = (
-        db.query(Material)
-        .filter(Material.id == material_id, Material.is_active == True)
-        .first()
-    )
+    material = await run_db(db, _get_active_material, material_id)
     if not material:
         raise HTTPException(status_code=404, detail="Material não encontrado.")
 
@@ -142,7 +219,7 @@ def edit_material_form(
 
 
 @router.post("/{material_id}/edit")
-def update_material(
+async def update_material(
     request: Request,
     material_id: int,
     title: str = Form(...),
@@ -151,14 +228,13 @@ def update_material(
     source_type: str = Form(...),
     external_url: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    read_db=Depends(get_read_session),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    material = (
-        db.query(Material)
-        .filter(Material.id == material_id, Material.is_active == True)
-        .first()
-    )
+    # Permissões conferidas na sessão de leitura; a escrita do arquivo
+    # acontece antes de abrir a transação curta no engine de escrita.
+    material = await run_db(read_db, _get_active_material, material_id)
     if not material:
         raise HTTPException(status_code=404, detail="Material não encontrado.")
 
@@ -171,91 +247,87 @@ def update_material(
     except ValueError:
         raise HTTPException(status_code=400, detail="Tipo ou origem inválidos.")
 
-    material.title = title.strip()
-    material.description = description.strip() if description else ""
-    material.type = mat_type
-    material.source_type = src_type
+    changes = {
+        "title": title.strip(),
+        "description": description.strip() if description else "",
+        "type": mat_type,
+        "source_type": src_type,
+    }
 
     if src_type == MaterialSourceType.UPLOAD:
         if file:
-            filename = file.filename or "material"
-            safe_name = filename.replace("..", "_").replace("/", "_")
-            dest = UPLOAD_DIR / safe_name
-            with dest.open("wb") as f:
-                f.write(file.file.read())
-            material.file_path = str(dest)
+            stored = await blob_store.store_upload(db, file)
+            changes["file_path"] = str(stored.path)
+            changes["file_size"] = stored.size
+            changes["file_sha256"] = stored.sha256
+            changes["original_filename"] = stored.original_filename
     else:
         if not external_url:
             raise HTTPException(status_code=400, detail="URL obrigatória para material externo.")
-        material.external_url = external_url.strip()
-        material.file_path = None
+        changes["external_url"] = external_url.strip()
+        changes["file_path"] = None
+        changes["file_size"] = None
+        changes["file_sha256"] = None
+        changes["original_filename"] = None
 
-    db.add(material)
-    db.commit()
+    await run_db(db, _update_material, material_id, changes)
+    catalog_cache.invalidate()
 
     return RedirectResponse(url="/materials/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.post("/{material_id}/delete")
-def delete_material(
+async def delete_material(
     material_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    material = (
-        db.query(Material)
-        .filter(Material.id == material_id, Material.is_active == True)
-        .first()
-    )
+    material = await run_db(db, _get_active_material, material_id)
     if not material:
         raise HTTPException(status_code=404, detail="Material não encontrado.")
 
     if current_user.role != UserRole.ADMIN and material.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão para excluir este material.")
 
-    material.is_active = False
-    db.add(material)
-    db.commit()
+    await run_db(db, _deactivate_material, material)
+    catalog_cache.invalidate()
 
     return RedirectResponse(url="/materials/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/{material_id}/open")
-def open_material(
+async def open_material(
     request: Request,
     material_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    material = (
-        db.query(Material)
-        .filter(Material.id == material_id, Material.is_active == True)
-        .first()
-    )
+    material = await run_db(db, _get_active_material, material_id)
 
     if not material:
         raise HTTPException(status_code=404, detail="Material não encontrado.")
 
-    # Log de acesso
-    access = AccessLog(
-        user_id=current_user.id,
-        material_id=material.id,
-        ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent", "")[:255],
-    )
-    db.add(access)
-    db.commit()
+    # Log de acesso, gravado em lote fora da requisição (pedidos de
+    # continuação de um Range, como os avanços num vídeo, não contam)
+    if not download_service.is_continuation(request):
+        await access_log_writer.record(
+            user_id=current_user.id,
+            material_id=material.id,
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent", "")[:255],
+        )
 
     if material.source_type == MaterialSourceType.URL:
         return RedirectResponse(url=material.external_url)
 
     if material.source_type == MaterialSourceType.UPLOAD:
-        if not material.file_path or not os.path.exists(material.file_path):
+        if not material.file_path:
             raise HTTPException(status_code=410, detail="Arquivo não está mais disponível.")
-        return FileResponse(
-            path=material.file_path,
-            filename=os.path.basename(material.file_path),
-            media_type="application/octet-stream",
+        return await download_service.serve_file(
+            request,
+            material.file_path,
+            filename=material.original_filename or os.path.basename(material.file_path),
+            sha256=material.file_sha256,
         )
 
     raise HTTPException(status_code=500, detail="Configuração inválida de material.")
@@ -1,24 +1,38 @@
-from fastapi import APIRouter, Depends, Request, Form, status
+from fastapi import APIRouter, Depends, File, Request, Form, UploadFile, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
+from app.core import password_hashing
 from app.core.dependencies import require_professor_or_admin
-from app.core.security import hash_password
-from app.db.session import get_db
+from app.core.principal import Principal, invalidate_principal
+from app.core.templating import templates
+from app.db.session import get_read_session, get_session, run_db
 from app.models.user import User, UserRole
+from app.services import listings, student_import
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+
+
+def _get_student(db: Session, student_id: int) -> User | None:
+    return db.query(User).filter(User.id == student_id, User.role == UserRole.STUDENT).first()
+
+
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
 
 
 @router.get("/manage", response_class=HTMLResponse)
-def manage_students(
+async def manage_students(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    students = db.query(User).filter(User.role == UserRole.STUDENT).order_by(User.created_at.desc()).all()
+    students = await run_db(db, listings.user_rows, role=UserRole.STUDENT)
     return templates.TemplateResponse(
         "students/manage.html",
         {"request": request, "students": students},
@@ -26,9 +40,9 @@ def manage_students(
 
 
 @router.get("/new", response_class=HTMLResponse)
-def new_student_form(
+async def new_student_form(
     request: Request,
-    current_user: User = Depends(require_professor_or_admin),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
     return templates.TemplateResponse(
         "students/form.html",
@@ -37,16 +51,17 @@ def new_student_form(
 
 
 @router.post("/new", response_class=HTMLResponse)
-def create_student(
+async def create_student(
     request: Request,
     name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_session),
+    read_db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
     email = email.strip().lower()
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await run_db(read_db, _get_user_by_email, email)
     if existing:
         return templates.TemplateResponse(
             "students/form.html",
@@ -58,27 +73,55 @@ def create_student(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
+    password_hash = await password_hashing.hash_password(password)
     student = User(
         name=name.strip(),
         email=email,
-        password_hash=hash_password(password),
+        password_hash=password_hash,
         role=UserRole.STUDENT,
         is_active=True,
     )
-    db.add(student)
-    db.commit()
+    await run_db(db, _save_user, student)
 
     return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.get("/import", response_class=HTMLResponse)
+async def import_students_form(
+    request: Request,
+    current_user: Principal = Depends(require_professor_or_admin),
+):
+    return templates.TemplateResponse(
+        "students/import.html",
+        {"request": request, "report": None},
+    )
+
+
+@router.post("/import", response_class=HTMLResponse)
+async def import_students(
+    request: Request,
+    file: UploadFile = File(...),
+    db=Depends(get_session),
+    read_db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
+):
+    # CSV lido em blocos: um SELECT IN, um lote de hashes e um INSERT por bloco
+    report = await student_import.import_students(file, db, read_db)
+    return templates.TemplateResponse(
+        "students/import.html",
+        {"request": request, "report": report},
+        status_code=status.HTTP_400_BAD_REQUEST if report.fatal else status.HTTP_200_OK,
+    )
+
+
 @router.get("/{student_id}/edit", response_class=HTMLResponse)
-def edit_student_form(
+async def edit_student_form(
     request: Request,
     student_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    student = db.query(User).filter(User.id == student_id, User.role == UserRole.STUDENT).first()
+    student = await run_db(db, _get_student, student_id)
     if not student:
         return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -89,21 +132,22 @@ def edit_student_form(
 
 
 @router.post("/{student_id}/edit", response_class=HTMLResponse)
-def update_student(
+async def update_student(
     request: Request,
     student_id: int,
     name: str = Form(...),
     email: str = Form(...),
     password: str | None = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_session),
+    read_db=Depends(get_read_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    student = db.query(User).filter(User.id == student_id, User.role == UserRole.STUDENT).first()
+    student = await run_db(read_db, _get_student, student_id)
     if not student:
         return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
 
     email = email.strip().lower()
-    email_owner = db.query(User).filter(User.email == email).first()
+    email_owner = await run_db(read_db, _get_user_by_email, email)
     if email_owner and email_owner.id != student.id:
         return templates.TemplateResponse(
             "students/form.html",
@@ -115,29 +159,35 @@ def update_student(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
+    password_hash = await password_hashing.hash_password(password) if password else None
+
+    student = await run_db(db, _get_student, student_id)
+    if not student:
+        return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
+
     student.name = name.strip()
     student.email = email
-    if password:
-        student.password_hash = hash_password(password)
+    if password_hash:
+        student.password_hash = password_hash
 
-    db.add(student)
-    db.commit()
+    await run_db(db, _save_user, student)
+    invalidate_principal(student_id)
 
     return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.post("/{student_id}/delete")
-def delete_student(
+async def delete_student(
     student_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_professor_or_admin),
+    db=Depends(get_session),
+    current_user: Principal = Depends(require_professor_or_admin),
 ):
-    student = db.query(User).filter(User.id == student_id, User.role == UserRole.STUDENT).first()
+    student = await run_db(db, _get_student, student_id)
     if not student:
         return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
 
     student.is_active = False
-    db.add(student)
-    db.commit()
+    await run_db(db, _save_user, student)
+    invalidate_principal(student_id)
 
     return RedirectResponse(url="/students/manage", status_code=status.HTTP_303_SEE_OTHER)
@@ -0,0 +1,348 @@
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.access_log import AccessLog
+from app.models.access_rollup import (
+    AccessRollupState,
+    AuthorDailyAccess,
+    AuthorDailyUser,
+    MaterialAccessTotal,
+    MaterialDailyAccess,
+    MaterialDailyUser,
+    MaterialUser,
+)
+from app.models.material import Material
+from app.models.user import User
+
+# Agregação incremental de access_logs. Cada lote de ids (lo, hi] é lido uma
+# única vez, agrupado por (dia, material, usuário) e somado às tabelas de
+# rollup na mesma transação que avança a marca d'água; um lote interrompido
+# é refeito por inteiro na próxima execução.
+#
+# Vários processos podem rodar a agregação ao mesmo tempo (um por worker):
+# cada lote é reservado com um UPDATE condicional na marca d'água, e quem
+# não consegue reservar (outro avançou antes) relê a marca e segue.
+
+STATE_NAME = "access_logs"
+
+ROLLUP_MODELS = (
+    MaterialDailyAccess,
+    AuthorDailyAccess,
+    MaterialAccessTotal,
+    MaterialDailyUser,
+    AuthorDailyUser,
+    MaterialUser,
+)
+
+
+def _dialect_insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _insert_new(db: Session, model, rows: List[dict]) -> None:
+    if rows:
+        stmt = _dialect_insert(db)(model.__table__).on_conflict_do_nothing()
+        db.execute(stmt, rows)
+
+
+def _add_counts(db: Session, model, keys: Tuple[str, ...], rows: List[dict], replace=()) -> None:
+    """Upsert somando access_count/unique_users às linhas existentes."""
+    if not rows:
+        return
+    table = model.__table__
+    stmt = _dialect_insert(db)(table)
+    set_ = {
+        name: table.c[name] + stmt.excluded[name]
+        for name in ("access_count", "unique_users")
+    }
+    for name in replace:
+        set_[name] = stmt.excluded[name]
+    db.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_), rows)
+
+
+def _new_users(db: Session, model, keys: Iterable, lo: int, hi: int) -> Dict[tuple, int]:
+    # Pares vistos pela primeira vez neste lote têm first_log_id em (lo, hi].
+    columns = [getattr(model, k) for k in keys]
+    rows = (
+        db.query(*columns, func.count())
+        .filter(model.first_log_id > lo, model.first_log_id <= hi)
+        .group_by(*columns)
+        .all()
+    )
+    return {tuple(row[:-1]): row[-1] for row in rows}
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _aggregate_range(db: Session, lo: int, hi: int) -> int:
+    day = func.date(AccessLog.accessed_at)
+    grouped = (
+        db.query(
+            day,
+            AccessLog.material_id,
+            Material.author_id,
+            AccessLog.user_id,
+            func.count(AccessLog.id),
+            func.min(AccessLog.id),
+            func.max(AccessLog.accessed_at),
+        )
+        .outerjoin(Material, Material.id == AccessLog.material_id)
+        .filter(AccessLog.id > lo, AccessLog.id <= hi, AccessLog.accessed_at.isnot(None))
+        .group_by(day, AccessLog.material_id, Material.author_id, AccessLog.user_id)
+        .all()
+    )
+
+    material_day = defaultdict(int)
+    author_day = defaultdict(int)
+    material_total = defaultdict(int)
+    last_access: Dict[int, datetime] = {}
+    material_day_users: Dict[tuple, int] = {}
+    author_day_users: Dict[tuple, int] = {}
+    material_users: Dict[tuple, int] = {}
+
+    total = 0
+    for raw_day, material_id, author_id, user_id, count, first_id, last_at in grouped:
+        d = _as_date(raw_day)
+        total += count
+        material_day[(d, material_id)] += count
+        material_total[material_id] += count
+        if last_at and (material_id not in last_access or last_at > last_access[material_id]):
+            last_access[material_id] = last_at
+        material_day_users[(d, material_id, user_id)] = first_id
+        key = (material_id, user_id)
+        material_users[key] = min(first_id, material_users.get(key, first_id))
+        if author_id is not None:
+            author_day[(d, author_id)] += count
+            key = (d, author_id, user_id)
+            author_day_users[key] = min(first_id, author_day_users.get(key, first_id))
+
+    _insert_new(db, MaterialDailyUser, [
+        {"day": d, "material_id": m, "user_id": u, "first_log_id": i}
+        for (d, m, u), i in material_day_users.items()
+    ])
+    _insert_new(db, AuthorDailyUser, [
+        {"day": d, "author_id": a, "user_id": u, "first_log_id": i}
+        for (d, a, u), i in author_day_users.items()
+    ])
+    _insert_new(db, MaterialUser, [
+        {"material_id": m, "user_id": u, "first_log_id": i}
+        for (m, u), i in material_users.items()
+    ])
+
+    new_material_day = _new_users(db, MaterialDailyUser, ("day", "material_id"), lo, hi)
+    new_author_day = _new_users(db, AuthorDailyUser, ("day", "author_id"), lo, hi)
+    new_material = _new_users(db, MaterialUser, ("material_id",), lo, hi)
+
+    _add_counts(db, MaterialDailyAccess, ("day", "material_id"), [
+        {"day": d, "material_id": m, "access_count": n,
+         "unique_users": new_material_day.get((d, m), 0)}
+        for (d, m), n in material_day.items()
+    ])
+    _add_counts(db, AuthorDailyAccess, ("day", "author_id"), [
+        {"day": d, "author_id": a, "access_count": n,
+         "unique_users": new_author_day.get((d, a), 0)}
+        for (d, a), n in author_day.items()
+    ])
+    _add_counts(db, MaterialAccessTotal, ("material_id",), [
+        {"material_id": m, "access_count": n, "unique_users": new_material.get((m,), 0),
+         "last_accessed_at": last_access.get(m)}
+        for m, n in material_total.items()
+    ], replace=("last_accessed_at",))
+    return total
+
+
+def _ensure_state(db: Session) -> None:
+    stmt = _dialect_insert(db)(AccessRollupState.__table__).values(name=STATE_NAME, last_log_id=0)
+    db.execute(stmt.on_conflict_do_nothing())
+
+
+def _watermark(db: Session) -> int:
+    return db.query(AccessRollupState.last_log_id).filter(AccessRollupState.name == STATE_NAME).scalar() or 0
+
+
+def _claim(db: Session, lo: int, hi: int) -> bool:
+    """Avança a marca de ``lo`` para ``hi`` se ninguém a moveu; a linha fica
+    travada até o commit, junto com os rollups do lote."""
+    result = db.execute(
+        update(AccessRollupState)
+        .where(AccessRollupState.name == STATE_NAME, AccessRollupState.last_log_id == lo)
+        .values(last_log_id=hi, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def aggregate(db: Session, batch_size: int | None = None) -> int:
+    """Agrega os logs acima da marca d'água; retorna quantos foram lidos."""
+    batch_size = batch_size or settings.ACCESS_ROLLUP_BATCH_SIZE
+    _ensure_state(db)
+    db.commit()
+    max_id = db.query(func.max(AccessLog.id)).scalar() or 0
+
+    total = 0
+    while True:
+        lo = _watermark(db)
+        if lo >= max_id:
+            break
+        hi = min(lo + batch_size, max_id)
+        # Encerra a leitura antes do UPDATE: no SQLite (WAL), promover uma
+        # leitura antiga a escrita falha na hora em vez de esperar o lock.
+        db.rollback()
+        if not _claim(db, lo, hi):
+            # Outro processo levou este lote
+            db.rollback()
+            continue
+        total += _aggregate_range(db, lo, hi)
+        db.commit()
+    db.commit()
+    return total
+
+
+def rebuild(db: Session) -> int:
+    """Descarta os rollups e agrega todos os logs desde o início."""
+    for model in ROLLUP_MODELS:
+        db.query(model).delete(synchronize_session=False)
+    _ensure_state(db)
+    db.execute(
+        update(AccessRollupState)
+        .where(AccessRollupState.name == STATE_NAME)
+        .values(last_log_id=0)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return aggregate(db)
+
+
+def run_incremental() -> int:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return aggregate(db)
+    finally:
+        db.close()
+
+
+# ------------------- Leitura (página de análises) -------------------
+
+
+class AnalyticsRow:
+    __slots__ = ("key", "label", "access_count", "unique_users", "extra")
+
+    def __init__(self, key, label, access_count, unique_users=None, extra=None):
+        self.key = key
+        self.label = label
+        self.access_count = access_count
+        self.unique_users = unique_users
+        self.extra = extra
+
+
+def load_analytics(db: Session, author_id: int | None, days: int) -> dict:
+    """Lê só os rollups. ``author_id`` restringe aos materiais do professor."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    if author_id is not None:
+        daily = [
+            AnalyticsRow(d, None, n, u)
+            for d, n, u in db.query(
+                AuthorDailyAccess.day, AuthorDailyAccess.access_count, AuthorDailyAccess.unique_users
+            )
+            .filter(AuthorDailyAccess.author_id == author_id, AuthorDailyAccess.day >= since)
+            .order_by(AuthorDailyAccess.day.desc())
+        ]
+    else:
+        # Sem usuários únicos aqui: somar os de cada material contaria duas vezes.
+        daily = [
+            AnalyticsRow(d, None, n)
+            for d, n in db.query(MaterialDailyAccess.day, func.sum(MaterialDailyAccess.access_count))
+            .filter(MaterialDailyAccess.day >= since)
+            .group_by(MaterialDailyAccess.day)
+            .order_by(MaterialDailyAccess.day.desc())
+        ]
+
+    period = (
+        db.query(
+            MaterialDailyAccess.material_id,
+            func.sum(MaterialDailyAccess.access_count).label("period_count"),
+        )
+        .filter(MaterialDailyAccess.day >= since)
+        .group_by(MaterialDailyAccess.material_id)
+        .subquery()
+    )
+    period_count = func.coalesce(period.c.period_count, 0)
+    materials_query = (
+        db.query(
+            Material.id,
+            Material.title,
+            MaterialAccessTotal.access_count,
+            MaterialAccessTotal.unique_users,
+            MaterialAccessTotal.last_accessed_at,
+            period_count,
+        )
+        .join(MaterialAccessTotal, MaterialAccessTotal.material_id == Material.id)
+        .outerjoin(period, period.c.material_id == Material.id)
+    )
+    if author_id is not None:
+        materials_query = materials_query.filter(Material.author_id == author_id)
+    materials = [
+        AnalyticsRow(mid, title, total, unique, {"last_accessed_at": last, "period_count": recent})
+        for mid, title, total, unique, last, recent in materials_query.order_by(
+            period_count.desc(), MaterialAccessTotal.access_count.desc()
+        ).limit(50)
+    ]
+
+    authors = []
+    if author_id is None:
+        authors = [
+            AnalyticsRow(aid, name, n, u)
+            for aid, name, n, u in db.query(
+                AuthorDailyAccess.author_id,
+                User.name,
+                func.sum(AuthorDailyAccess.access_count),
+                func.sum(AuthorDailyAccess.unique_users),
+            )
+            .outerjoin(User, User.id == AuthorDailyAccess.author_id)
+            .filter(AuthorDailyAccess.day >= since)
+            .group_by(AuthorDailyAccess.author_id, User.name)
+            .order_by(func.sum(AuthorDailyAccess.access_count).desc())
+        ]
+
+    state = db.get(AccessRollupState, STATE_NAME)
+    return {
+        "daily": daily,
+        "materials": materials,
+        "authors": authors,
+        "period_total": sum(row.access_count for row in daily),
+        "last_log_id": state.last_log_id if state else 0,
+        "updated_at": state.updated_at if state else None,
+    }
+
+
+if __name__ == "__main__":
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Agrega os logs de acesso nos rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="descarta e recalcula tudo")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        total = rebuild(db) if args.rebuild else aggregate(db)
+        print(f"Logs de acesso agregados: {total}")
+    finally:
+        db.close()
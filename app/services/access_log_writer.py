@@ -0,0 +1,202 @@
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.access_log import AccessLog
+
+# Gravação adiada (write-behind) dos logs de acesso. As rotas só enfileiram;
+# uma thread em segundo plano insere em lote, numa única transação, quando
+# junta ACCESS_LOG_BATCH_SIZE linhas ou a cada ACCESS_LOG_FLUSH_INTERVAL_SECONDS.
+#
+# ACCESS_LOG_DURABILITY:
+#   "batched" - a rota não espera a gravação; um crash perde no máximo o
+#               que estava na fila.
+#   "sync"    - a rota espera o commit do lote que contém o seu registro
+#               (acessos concorrentes ainda dividem a mesma transação).
+#
+# Fila cheia: quem registra espera até ACCESS_LOG_ENQUEUE_TIMEOUT_SECONDS
+# (backpressure); passado isso, o registro é descartado e contado.
+
+
+class _Entry:
+    __slots__ = ("row", "done")
+
+    def __init__(self, row: dict, done: Future | None):
+        self.row = row
+        self.done = done
+
+
+_STOP = object()
+
+_queue: "queue.Queue" = queue.Queue(maxsize=settings.ACCESS_LOG_QUEUE_SIZE)
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+
+_stats = {
+    "written": 0,
+    "dropped": 0,
+    "failed": 0,
+    "batches": 0,
+    "last_batch_size": 0,
+    "last_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0,
+}
+
+
+def _write(batch: List[_Entry]) -> None:
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            conn.execute(AccessLog.__table__.insert(), [entry.row for entry in batch])
+    except Exception as exc:
+        _stats["failed"] += len(batch)
+        print(f"[ACCESS LOG] Falha ao gravar lote de {len(batch)}: {exc}")
+        for entry in batch:
+            if entry.done is not None:
+                entry.done.set_exception(exc)
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _stats["written"] += len(batch)
+    _stats["batches"] += 1
+    _stats["last_batch_size"] = len(batch)
+    _stats["last_flush_ms"] = elapsed_ms
+    _stats["total_flush_ms"] += elapsed_ms
+    _stats["max_flush_ms"] = max(_stats["max_flush_ms"], elapsed_ms)
+    for entry in batch:
+        if entry.done is not None:
+            entry.done.set_result(None)
+
+
+def _collect(first) -> tuple[List[_Entry], bool]:
+    """Junta um lote a partir do primeiro item; retorna (lote, parar)."""
+    stopping = first is _STOP
+    batch = [] if stopping else [first]
+    # No modo "sync" não se espera o lote encher: grava o que já está na fila.
+    wait = settings.ACCESS_LOG_DURABILITY != "sync" and not stopping
+    deadline = time.monotonic() + settings.ACCESS_LOG_FLUSH_INTERVAL_SECONDS
+
+    while stopping or len(batch) < settings.ACCESS_LOG_BATCH_SIZE:
+        try:
+            if wait:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                item = _queue.get(timeout=remaining)
+            else:
+                item = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is _STOP:
+            stopping = True
+            wait = False
+            continue
+        batch.append(item)
+        if stopping and len(batch) >= settings.ACCESS_LOG_BATCH_SIZE:
+            _write(batch)
+            batch = []
+    return batch, stopping
+
+
+def _run() -> None:
+    while True:
+        batch, stopping = _collect(_queue.get())
+        if batch:
+            _write(batch)
+        if stopping:
+            return
+
+
+def start() -> None:
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_run, name="access-log-writer", daemon=True)
+        _thread.start()
+
+
+def stop(timeout: float = 10.0) -> None:
+    """Grava o que estiver na fila e encerra a thread (shutdown)."""
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    if thread is None or not thread.is_alive():
+        return
+    try:
+        _queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+        print("[ACCESS LOG] Fila cheia no encerramento; registros pendentes perdidos.")
+        return
+    thread.join(timeout)
+
+
+def flush(timeout: float = 10.0) -> None:
+    """Bloqueia até a fila atual ser gravada (scripts e comandos)."""
+    stop(timeout)
+    start()
+
+
+atexit.register(stop)
+
+
+def _enqueue(entry: _Entry) -> bool:
+    try:
+        _queue.put(entry, timeout=settings.ACCESS_LOG_ENQUEUE_TIMEOUT_SECONDS)
+        return True
+    except queue.Full:
+        _stats["dropped"] += 1
+        return False
+
+
+async def record(user_id: int, material_id: int, ip: str | None, user_agent: str | None) -> None:
+    start()
+    done = Future() if settings.ACCESS_LOG_DURABILITY == "sync" else None
+    entry = _Entry(
+        {
+            "user_id": user_id,
+            "material_id": material_id,
+            "accessed_at": datetime.utcnow(),
+            "ip": ip,
+            "user_agent": user_agent,
+        },
+        done,
+    )
+
+    try:
+        _queue.put_nowait(entry)
+    except queue.Full:
+        # Backpressure: espera vaga fora do event loop.
+        if not await run_in_threadpool(_enqueue, entry):
+            print("[ACCESS LOG] Fila cheia, registro de acesso descartado.")
+            return
+
+    if done is not None:
+        await asyncio.wrap_future(done)
+
+
+def stats() -> Dict[str, float]:
+    batches = _stats["batches"]
+    return {
+        "queue_depth": _queue.qsize(),
+        "queue_capacity": _queue.maxsize,
+        "durability": settings.ACCESS_LOG_DURABILITY,
+        "written": _stats["written"],
+        "dropped": _stats["dropped"],
+        "failed": _stats["failed"],
+        "batches": batches,
+        "last_batch_size": _stats["last_batch_size"],
+        "last_flush_ms": round(_stats["last_flush_ms"], 3),
+        "avg_flush_ms": round(_stats["total_flush_ms"] / batches, 3) if batches else 0.0,
+        "max_flush_ms": round(_stats["max_flush_ms"], 3),
+    }
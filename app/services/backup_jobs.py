@@ -0,0 +1,362 @@
+import json
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.backup_config import BackupConfig
+from app.models.backup_job import BackupJob, BackupJobState
+from app.services.backup_restore import verify_snapshot
+from app.services.backup_service import create_backup
+
+# Backups como jobs: as rotas e o agendador só criam uma linha em
+# backup_jobs; uma thread dedicada executa create_backup() (ou, para
+# kind="verify", verify_snapshot()) fora do event loop e grava estado, fase,
+# progresso e, em caso de falha, o traceback.
+# Só um job fica ativo por vez: pedir outro enquanto há um na fila ou em
+# execução devolve o existente (e a rota avisa que está ocupado).
+#
+# Cada worker tem a sua thread. O job em execução guarda o processo dono e
+# um sinal de vida (heartbeat_at) renovado por uma thread à parte; outro
+# worker só o dá como interrompido se o dono morreu ou o sinal parou.
+
+ACTIVE_STATES = (BackupJobState.QUEUED, BackupJobState.RUNNING)
+# Intervalo mínimo entre gravações de progresso (segundos)
+PROGRESS_INTERVAL = 1.0
+# Sinal de vida do job em execução e quanto tempo sem ele o torna órfão
+HEARTBEAT_INTERVAL = 15.0
+STALE_AFTER = 120.0
+
+_queue: "queue.Queue[int]" = queue.Queue()
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_owner_id: Tuple[int, str] | None = None
+
+
+def _owner() -> str:
+    """Identifica este processo: host, pid e um token (o pid se repete
+    entre reinícios de contêiner). Recalculado após um fork."""
+    global _owner_id
+    pid = os.getpid()
+    if _owner_id is None or _owner_id[0] != pid:
+        _owner_id = (pid, f"{socket.gethostname()}:{pid}:{secrets.token_hex(4)}")
+    return _owner_id[1]
+
+
+def _owner_is_dead(owner: Optional[str]) -> bool:
+    """Só afirma que o dono morreu quando dá para conferir (mesmo host)."""
+    if not owner or owner == _owner() or os.name == "nt":
+        return False
+    host, _, rest = owner.partition(":")
+    pid_text = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid_text.isdigit():
+        return False
+    pid = int(pid_text)
+    if pid == os.getpid():
+        # Mesmo pid com outro token: processo anterior a este
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _update(db: Session, job_id: int, **values) -> int:
+    updated = db.query(BackupJob).filter(BackupJob.id == job_id).update(values, synchronize_session=False)
+    db.commit()
+    return updated
+
+
+class _Reporter:
+    def __init__(self, db: Session, job_id: int):
+        self.db = db
+        self.job_id = job_id
+        self.last = 0.0
+
+    def __call__(self, fraction: float, phase: str) -> None:
+        now = time.monotonic()
+        if now - self.last < PROGRESS_INTERVAL and fraction < 1.0:
+            return
+        self.last = now
+        _update(self.db, self.job_id, progress=round(fraction, 4), phase=phase)
+
+
+class _Heartbeat:
+    """Renova heartbeat_at do job a cada HEARTBEAT_INTERVAL enquanto ele
+    roda, com sessão própria (o job pode passar minutos sem reportar)."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"backup-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(HEARTBEAT_INTERVAL):
+            db = SessionLocal()
+            try:
+                _update(db, self.job_id, heartbeat_at=datetime.utcnow())
+            except Exception as exc:
+                print(f"[BACKUP] Falha ao renovar o job #{self.job_id}: {exc}")
+            finally:
+                db.close()
+
+
+def _execute(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        claimed = (
+            db.query(BackupJob)
+            .filter(BackupJob.id == job_id, BackupJob.state == BackupJobState.QUEUED)
+            .update(
+                {
+                    "state": BackupJobState.RUNNING,
+                    "started_at": now,
+                    "phase": "iniciando",
+                    "owner": _owner(),
+                    "heartbeat_at": now,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            return
+
+        kind, target = db.query(BackupJob.kind, BackupJob.snapshot_name).filter(BackupJob.id == job_id).one()
+        with _Heartbeat(job_id):
+            if kind == "verify":
+                _verify(db, job_id, target)
+            else:
+                _backup(db, job_id)
+    finally:
+        db.close()
+
+
+def _backup(db: Session, job_id: int) -> None:
+    try:
+        snapshot_name = create_backup(progress=_Reporter(db, job_id))
+    except Exception:
+        db.rollback()
+        _update(
+            db,
+            job_id,
+            state=BackupJobState.FAILED,
+            error=traceback.format_exc(),
+            finished_at=datetime.utcnow(),
+        )
+        print(f"[BACKUP] Job #{job_id} falhou.")
+        return
+
+    _update(
+        db,
+        job_id,
+        state=BackupJobState.SUCCEEDED,
+        progress=1.0,
+        phase="concluído",
+        snapshot_name=snapshot_name,
+        finished_at=datetime.utcnow(),
+    )
+    print(f"[BACKUP] Job #{job_id} concluído: {snapshot_name}")
+
+
+def _verify(db: Session, job_id: int, snapshot_name: str) -> None:
+    try:
+        result = verify_snapshot(snapshot_name, progress=_Reporter(db, job_id))
+    except Exception:
+        db.rollback()
+        _update(db, job_id, state=BackupJobState.FAILED, error=traceback.format_exc(), finished_at=datetime.utcnow())
+        print(f"[BACKUP] Verificação #{job_id} falhou.")
+        return
+
+    problems = []
+    if not result["manifest_checksum_ok"]:
+        problems.append("checksum do manifest divergente")
+    if result["missing"]:
+        problems.append(f"{len(result['missing'])} arquivo(s) ausente(s)")
+    if result["mismatched"]:
+        problems.append(f"{len(result['mismatched'])} arquivo(s) com hash divergente")
+    if result["database"] not in ("ok", "sem banco"):
+        problems.append(f"banco: {result['database']}")
+
+    _update(
+        db,
+        job_id,
+        state=BackupJobState.SUCCEEDED if result["ok"] else BackupJobState.FAILED,
+        progress=1.0,
+        phase="concluído",
+        result=json.dumps(result, ensure_ascii=False),
+        error="; ".join(problems) or None,
+        finished_at=datetime.utcnow(),
+    )
+    print(f"[BACKUP] Verificação #{job_id} de {snapshot_name}: {'ok' if result['ok'] else 'com problemas'}")
+
+
+def _run() -> None:
+    while True:
+        job_id = _queue.get()
+        try:
+            _execute(job_id)
+        except Exception as exc:
+            print(f"[BACKUP] Erro ao executar o job #{job_id}: {exc}")
+
+
+def _fail_orphans(db: Session) -> int:
+    """Marca como falhos os jobs em execução cujo processo morreu ou que
+    não dão sinal de vida há STALE_AFTER; os de workers vivos ficam."""
+    stale_before = datetime.utcnow() - timedelta(seconds=STALE_AFTER)
+    running = (
+        db.query(BackupJob.id, BackupJob.owner, BackupJob.heartbeat_at)
+        .filter(BackupJob.state == BackupJobState.RUNNING)
+        .all()
+    )
+    failed = 0
+    for job_id, owner, heartbeat_at in running:
+        if heartbeat_at is not None and heartbeat_at >= stale_before and not _owner_is_dead(owner):
+            continue
+        # Condicionado ao mesmo heartbeat: se o dono renovou nesse meio-tempo, fica.
+        same_heartbeat = (
+            BackupJob.heartbeat_at.is_(None) if heartbeat_at is None else BackupJob.heartbeat_at == heartbeat_at
+        )
+        failed += (
+            db.query(BackupJob)
+            .filter(BackupJob.id == job_id, BackupJob.state == BackupJobState.RUNNING, same_heartbeat)
+            .update(
+                {
+                    "state": BackupJobState.FAILED,
+                    "error": "Interrompido: o processo que executava o job foi encerrado.",
+                    "finished_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+    db.commit()
+    return failed
+
+
+def _recover(db: Session) -> None:
+    """Jobs deixados por processos encerrados: os que estavam rodando são
+    marcados como falhos; os que estavam na fila voltam para ela."""
+    _fail_orphans(db)
+    for (job_id,) in db.query(BackupJob.id).filter(BackupJob.state == BackupJobState.QUEUED).order_by(BackupJob.id):
+        _queue.put(job_id)
+
+
+def start() -> None:
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        db = SessionLocal()
+        try:
+            _recover(db)
+        finally:
+            db.close()
+        _thread = threading.Thread(target=_run, name="backup-worker", daemon=True)
+        _thread.start()
+
+
+def submit(
+    db: Session,
+    trigger: str = "manual",
+    requested_by: Optional[int] = None,
+    kind: str = "backup",
+    snapshot_name: Optional[str] = None,
+) -> Tuple[BackupJob, bool]:
+    """Enfileira um backup ou verificação. Um job por vez, para não
+    disputarem o disco: com outro ativo, devolve ``(ativo, False)``."""
+    _fail_orphans(db)
+    active = (
+        db.query(BackupJob)
+        .filter(BackupJob.state.in_(ACTIVE_STATES))
+        .order_by(BackupJob.id)
+        .first()
+    )
+    if active:
+        return active, False
+
+    job = BackupJob(
+        kind=kind,
+        trigger=trigger,
+        requested_by=requested_by,
+        snapshot_name=snapshot_name,
+        state=BackupJobState.QUEUED,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _queue.put(job.id)
+    start()
+    return job, True
+
+
+def schedule_if_due() -> Optional[int]:
+    """Chamado pelo agendador: enfileira o backup automático se venceu."""
+    db = SessionLocal()
+    try:
+        cfg = db.query(BackupConfig).first()
+        if not cfg or not cfg.enabled:
+            return None
+        now = datetime.utcnow()
+        due = (
+            not cfg.last_run_at
+            or (now - cfg.last_run_at).total_seconds() >= cfg.interval_hours * 3600
+        )
+        if not due:
+            return None
+        cfg.last_run_at = now
+        db.commit()
+        job, created = submit(db, trigger="scheduled")
+        if created:
+            print(f"[BACKUP] Backup automático enfileirado: job #{job.id}")
+        else:
+            print(f"[BACKUP] Backup automático adiado: job #{job.id} ainda ativo.")
+        return job.id
+    finally:
+        db.close()
+
+
+def job_dict(job: BackupJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind or "backup",
+        "trigger": job.trigger,
+        "state": job.state.value,
+        "progress": job.progress,
+        "phase": job.phase,
+        "snapshot_name": job.snapshot_name,
+        "error": job.error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def recent_jobs(db: Session, limit: int = 10) -> List[dict]:
+    jobs = db.query(BackupJob).order_by(BackupJob.id.desc()).limit(limit).all()
+    return [job_dict(job) for job in jobs]
+
+
+def get_job(db: Session, job_id: int) -> Optional[dict]:
+    job = db.get(BackupJob, job_id)
+    return job_dict(job) if job else None
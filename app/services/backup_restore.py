@@ -0,0 +1,306 @@
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.services import backup_service
+from app.services.backup_service import (
+    CHUNK_SIZE,
+    DB_BACKUP_NAME,
+    MANIFEST_NAME,
+    Progress,
+    load_manifest,
+)
+
+# Verificação e restauração de snapshots (ver backup_service).
+#
+#   python -m app.services.backup_restore verify  backup-AAAAMMDD-HHMMSS
+#   python -m app.services.backup_restore restore backup-AAAAMMDD-HHMMSS
+#
+# A verificação recalcula o SHA-256 de cada arquivo do manifest em processos
+# separados (o hash é CPU) e roda quick_check na cópia do banco. A
+# restauração prepara tudo antes de tocar no que está em uso: os arquivos
+# são copiados em paralelo para um diretório temporário ao lado de
+# uploads/materials e o banco para um temporário ao lado do atual. Só então
+# troca os uploads e, por último, o banco; se a troca do banco falhar, os
+# uploads voltam. O diretório anterior é mantido como
+# uploads/materials.before-restore-<data>.
+
+
+def _no_progress(fraction: float, phase: str) -> None:
+    pass
+
+
+def snapshot_dir(name: str) -> Path:
+    path = backup_service.BACKUP_DIR / name
+    if not name.startswith("backup-") or path.parent != backup_service.BACKUP_DIR or not path.is_dir():
+        raise ValueError(f"Snapshot inexistente: {name}")
+    if not (path / MANIFEST_NAME).exists():
+        raise ValueError(f"Snapshot sem manifest (incompleto ou anterior ao formato atual): {name}")
+    return path
+
+
+def _throughput(size: int, seconds: float) -> float:
+    return round(size / (1024 * 1024) / seconds, 2) if seconds > 0 else 0.0
+
+
+def _hash_file(path: str) -> tuple[Optional[int], Optional[str]]:
+    # Roda nos processos de verificação.
+    try:
+        hasher = sha256()
+        size = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                hasher.update(chunk)
+                size += len(chunk)
+        return size, hasher.hexdigest()
+    except FileNotFoundError:
+        return None, None
+
+
+def _database_file(snapshot: Path, manifest: dict, workdir: Path) -> Optional[Path]:
+    """Caminho da cópia do banco, extraindo do .tar.* se preciso."""
+    database = manifest.get("database")
+    if not database:
+        return None
+    archive = database.get("archive")
+    if not archive:
+        return snapshot / database["file"]
+    with tarfile.open(snapshot / archive["file"], "r:*") as tar:
+        _extract_database(tar, workdir)
+    return workdir / DB_BACKUP_NAME
+
+
+def _extract_database(tar: tarfile.TarFile, workdir: Path) -> None:
+    if hasattr(tarfile, "data_filter"):
+        tar.extract(DB_BACKUP_NAME, workdir, filter="data")
+        return
+    # Python sem filtros de extração (3.10 antes do 3.10.12): só aceita um
+    # arquivo regular e grava no caminho escolhido aqui, nunca no do tar.
+    member = tar.getmember(DB_BACKUP_NAME)
+    if not member.isfile():
+        raise ValueError(f"{DB_BACKUP_NAME} no arquivo não é um arquivo regular.")
+    with tar.extractfile(member) as src, open(workdir / DB_BACKUP_NAME, "wb") as dest:
+        shutil.copyfileobj(src, dest, CHUNK_SIZE)
+
+
+def _check_database(path: Path) -> str:
+    con = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return con.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        con.close()
+
+
+def verify_snapshot(name: str, workers: int = 0, progress: Progress = _no_progress) -> dict:
+    """Confere o snapshot contra o manifest: checksum do próprio manifest,
+    tamanho e SHA-256 de cada arquivo e integridade da cópia do banco."""
+    snapshot = snapshot_dir(name)
+    manifest_bytes = (snapshot / MANIFEST_NAME).read_bytes()
+    checksum_file = snapshot / "checksum.txt"
+    manifest_ok = checksum_file.exists() and checksum_file.read_text().strip() == sha256(manifest_bytes).hexdigest()
+    manifest = load_manifest(snapshot)
+
+    started = time.monotonic()
+    workers = workers or settings.BACKUP_VERIFY_WORKERS or os.cpu_count() or 1
+    files = manifest.get("files", [])
+    missing, mismatched = [], []
+    total_bytes = 0
+
+    if files:
+        # spawn: o processo do servidor tem threads, que não convivem bem com fork.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            paths = [str(snapshot / "materials" / entry["path"]) for entry in files]
+            chunksize = max(1, len(paths) // (workers * 8))
+            results = pool.map(_hash_file, paths, chunksize=chunksize)
+            for done, (entry, (size, digest)) in enumerate(zip(files, results), start=1):
+                if size is None:
+                    missing.append(entry["path"])
+                elif size != entry["size"] or digest != entry["sha256"]:
+                    mismatched.append(entry["path"])
+                else:
+                    total_bytes += size
+                progress(0.9 * done / len(files), "arquivos")
+    files_seconds = time.monotonic() - started
+
+    progress(0.9, "banco")
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            db_file = _database_file(snapshot, manifest, Path(workdir))
+            database = _check_database(db_file) if db_file else "sem banco"
+        except (OSError, sqlite3.Error, tarfile.TarError, KeyError) as exc:
+            database = f"erro: {exc}"
+    progress(1.0, "concluído")
+
+    return {
+        "snapshot": name,
+        "ok": manifest_ok and not missing and not mismatched and database in ("ok", "sem banco"),
+        "manifest_checksum_ok": manifest_ok,
+        "files": len(files),
+        "missing": missing,
+        "mismatched": mismatched,
+        "database": database,
+        "workers": workers,
+        "bytes": total_bytes,
+        "seconds": round(time.monotonic() - started, 3),
+        "throughput_mb_s": _throughput(total_bytes, files_seconds),
+    }
+
+
+def _copy_file(src: Path, dest: Path) -> int:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(src, dest)
+    return dest.stat().st_size
+
+
+def _stage_database(snapshot: Path, manifest: dict, workdir: Path) -> tuple[Optional[Path], dict]:
+    """Copia o banco do snapshot para ``workdir``, ao lado do atual (mesma
+    partição, para a troca final ser um os.replace)."""
+    started = time.monotonic()
+    source = _database_file(snapshot, manifest, workdir)
+    if source is None:
+        return None, {"restored": False}
+    staged = workdir / "restore.db"
+    shutil.copyfile(source, staged)
+    size = staged.stat().st_size
+    seconds = time.monotonic() - started
+    return staged, {
+        "restored": True,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "throughput_mb_s": _throughput(size, seconds),
+    }
+
+
+def _stage_uploads(snapshot: Path, files: list, staging: Path, workers: int) -> dict:
+    started = time.monotonic()
+    total_bytes = 0
+    # Cópia é E/S (copy_file_range/sendfile): threads bastam.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_copy_file, snapshot / "materials" / entry["path"], staging / entry["path"])
+            for entry in files
+        ]
+        for future in as_completed(futures):
+            total_bytes += future.result()
+    seconds = time.monotonic() - started
+    return {
+        "files": len(files),
+        "bytes": total_bytes,
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "throughput_mb_s": _throughput(total_bytes, seconds),
+    }
+
+
+def restore_snapshot(name: str, workers: int = 0) -> dict:
+    """Reconstrói o banco e uploads/materials a partir do snapshot.
+
+    Deve rodar com a aplicação parada. Uma falha na cópia não altera nada.
+    """
+    snapshot = snapshot_dir(name)
+    manifest = load_manifest(snapshot)
+    workers = workers or settings.BACKUP_RESTORE_WORKERS
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+    target = backup_service.database_path()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    uploads_dir = backup_service.UPLOADS_DIR
+    uploads_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = uploads_dir.with_name(f"{uploads_dir.name}.restore-{stamp}")
+    staging.mkdir()
+    workdir = Path(tempfile.mkdtemp(dir=target.parent))
+
+    try:
+        staged_db, database = _stage_database(snapshot, manifest, workdir)
+        uploads = _stage_uploads(snapshot, manifest.get("files", []), staging, workers)
+
+        previous = None
+        if uploads_dir.exists():
+            previous = uploads_dir.with_name(f"{uploads_dir.name}.before-restore-{stamp}")
+            os.replace(uploads_dir, previous)
+        os.replace(staging, uploads_dir)
+
+        if staged_db is not None:
+            try:
+                os.replace(staged_db, target)
+            except BaseException:
+                # Banco não trocado: devolve os uploads de antes
+                os.replace(uploads_dir, staging)
+                if previous:
+                    os.replace(previous, uploads_dir)
+                raise
+            # -wal/-shm do banco antigo não valem para o restaurado.
+            for suffix in ("-wal", "-shm"):
+                Path(f"{target}{suffix}").unlink(missing_ok=True)
+            database["path"] = str(target)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        # Só existe aqui se a troca não aconteceu (falha na cópia ou no banco)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    uploads["previous_dir"] = str(previous) if previous else None
+    return {"snapshot": name, "database": database, "uploads": uploads}
+
+
+def _print_verify(result: dict) -> None:
+    status = "ÍNTEGRO" if result["ok"] else "COM PROBLEMAS"
+    print(f"[VERIFICAÇÃO] {result['snapshot']}: {status}")
+    print(f"  manifest: {'ok' if result['manifest_checksum_ok'] else 'checksum divergente'}")
+    print(f"  arquivos: {result['files']} ({len(result['missing'])} ausentes, {len(result['mismatched'])} divergentes)")
+    for path in result["missing"][:20]:
+        print(f"    ausente: {path}")
+    for path in result["mismatched"][:20]:
+        print(f"    divergente: {path}")
+    print(f"  banco: {result['database']}")
+    print(f"  {result['bytes']} bytes em {result['seconds']}s "
+          f"({result['throughput_mb_s']} MB/s, {result['workers']} processos)")
+
+
+def _print_restore(result: dict) -> None:
+    database, uploads = result["database"], result["uploads"]
+    print(f"[RESTAURAÇÃO] {result['snapshot']}")
+    if database.get("restored"):
+        print(f"  banco: {database['path']} - {database['bytes']} bytes em "
+              f"{database['seconds']}s ({database['throughput_mb_s']} MB/s)")
+    else:
+        print("  banco: snapshot sem banco, mantido como está")
+    print(f"  uploads: {uploads['files']} arquivos, {uploads['bytes']} bytes em "
+          f"{uploads['seconds']}s ({uploads['throughput_mb_s']} MB/s, {uploads['workers']} threads)")
+    if uploads["previous_dir"]:
+        print(f"  uploads anteriores preservados em {uploads['previous_dir']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica ou restaura um snapshot de backup.")
+    parser.add_argument("command", choices=["verify", "restore"])
+    parser.add_argument("snapshot", help="nome do diretório, ex.: backup-20250101-030000")
+    parser.add_argument("--workers", type=int, default=0, help="processos (verify) ou threads (restore)")
+    parser.add_argument("--yes", action="store_true", help="não pede confirmação antes de restaurar")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        result = verify_snapshot(args.snapshot, args.workers)
+        _print_verify(result)
+        raise SystemExit(0 if result["ok"] else 1)
+
+    if not args.yes:
+        answer = input(
+            f"Substituir o banco e uploads/materials pelo conteúdo de {args.snapshot}? "
+            "Pare a aplicação antes. [s/N] "
+        )
+        if answer.strip().lower() not in ("s", "sim"):
+            raise SystemExit("Restauração cancelada.")
+    _print_restore(restore_snapshot(args.snapshot, args.workers))
@@ -1,36 +1,266 @@
 
+import json
+import os
 import shutil
+import sqlite3
+import tarfile
+import time
 from datetime import datetime
 from hashlib import sha256
 from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DB_FILE = BASE_DIR / "senai_autohub.db"
 UPLOADS_DIR = BASE_DIR / "uploads" / "materials"
 BACKUP_DIR = BASE_DIR / "backups"
 
+DB_BACKUP_NAME = "senai_autohub.db"
+ARCHIVE_FORMATS = {"gz": "w:gz", "xz": "w:xz"}
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+# Temporários de upload em andamento não entram no backup.
+SKIP_DIRS = {".incoming"}
+# Fração do progresso atribuída à cópia do banco; o resto é dos uploads.
+DB_PROGRESS_SHARE = 0.3
+
+Progress = Callable[[float, str], None]
+
+# Snapshots incrementais:
+#   backups/backup-<timestamp>/
+#       senai_autohub.db    cópia consistente (API de backup online do SQLite)
+#                           ou database.tar.gz / database.tar.xz
+#       materials/...       espelho de uploads/materials
+#       manifest.json       (caminho, tamanho, mtime, sha256) de cada arquivo
+#       checksum.txt        sha256 do manifest
+#
+# Arquivos com mesmo tamanho e mtime do snapshot anterior viram hardlinks
+# para ele (sem cópia nem novo hash); só os novos ou alterados são copiados,
+# com o hash calculado em blocos durante a própria cópia.
+
+
+def _snapshot_dirs() -> list[Path]:
+    if not BACKUP_DIR.exists():
+        return []
+    return sorted(p for p in BACKUP_DIR.glob("backup-*") if p.is_dir())
+
+
+def load_manifest(snapshot_dir: Path) -> Optional[dict]:
+    path = snapshot_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latest_snapshot() -> Optional[Path]:
+    """Último snapshot completo (o manifest é gravado por último)."""
+    for snapshot_dir in reversed(_snapshot_dirs()):
+        if (snapshot_dir / MANIFEST_NAME).exists():
+            return snapshot_dir
+    return None
+
+
+def _copy_hashing(src: Path, dest: Path) -> str:
+    hasher = sha256()
+    with src.open("rb") as fin, dest.open("wb") as fout:
+        while chunk := fin.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            fout.write(chunk)
+    shutil.copystat(src, dest)
+    return hasher.hexdigest()
+
+
+def _link(previous: Path, dest: Path, size: int) -> bool:
+    try:
+        # Cópia anterior apagada ou truncada não é reaproveitada.
+        if previous.stat().st_size != size:
+            return False
+        os.link(previous, dest)
+        return True
+    except OSError:
+        # Sistema de arquivos sem hardlink (ou outro dispositivo): copia.
+        return False
+
+
+def _iter_files(root: Path):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            yield Path(dirpath) / name
+
+
+def _snapshot_uploads(
+    dest_root: Path,
+    previous_dir: Optional[Path],
+    previous: Dict[str, dict],
+    progress: Progress,
+) -> dict:
+    files = []
+    linked = copied = 0
+    bytes_copied = bytes_linked = 0
+
+    sources = list(_iter_files(UPLOADS_DIR))
+    for index, src in enumerate(sources):
+        progress(DB_PROGRESS_SHARE + (1 - DB_PROGRESS_SHARE) * index / len(sources), "uploads")
+        rel = src.relative_to(UPLOADS_DIR).as_posix()
+        st = src.stat()
+        dest = dest_root / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        old = previous.get(rel)
+        if (
+            old is not None
+            and old["size"] == st.st_size
+            and old["mtime_ns"] == st.st_mtime_ns
+            and _link(previous_dir / "materials" / rel, dest, st.st_size)
+        ):
+            digest = old["sha256"]
+            linked += 1
+            bytes_linked += st.st_size
+        else:
+            digest = _copy_hashing(src, dest)
+            copied += 1
+            bytes_copied += st.st_size
 
-def create_backup() -> str:
+        files.append({"path": rel, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest})
+
+    return {
+        "files": files,
+        "stats": {
+            "files": len(files),
+            "linked": linked,
+            "copied": copied,
+            "bytes_linked": bytes_linked,
+            "bytes_copied": bytes_copied,
+        },
+    }
+
+
+def database_path() -> Path:
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return Path(url.database)
+    return DB_FILE
+
+
+def _backup_database(source: Path, dest: Path, report: Progress) -> dict:
+    """Copia o banco com a API de backup online, ``BACKUP_DB_PAGES_PER_STEP``
+    páginas por vez; entre um passo e outro os escritores seguem livres.
+    Inclui o que ainda está no -wal, ao contrário de copiar o arquivo."""
+    steps = []
+    page_size = 0
+    last = {"time": time.monotonic(), "remaining": None}
+
+    def progress(status, remaining, total):
+        now = time.monotonic()
+        before = total if last["remaining"] is None else last["remaining"]
+        steps.append({
+            "pages": before - remaining,
+            "bytes": (before - remaining) * page_size,
+            "remaining": remaining,
+            "seconds": round(now - last["time"], 4),
+        })
+        last["remaining"] = remaining
+        report(DB_PROGRESS_SHARE * (1 - remaining / total if total else 1), "banco")
+        time.sleep(settings.BACKUP_DB_STEP_SLEEP_MS / 1000)
+        last["time"] = time.monotonic()
+
+    started = time.monotonic()
+    src = sqlite3.connect(
+        f"{source.resolve().as_uri()}?mode=ro", uri=True, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    )
+    dst = sqlite3.connect(dest)
+    try:
+        page_size = src.execute("PRAGMA page_size").fetchone()[0]
+        src.backup(dst, pages=settings.BACKUP_DB_PAGES_PER_STEP, progress=progress)
+        # O snapshot fica autocontido (sem -wal ao lado).
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+
+    return {
+        "file": dest.name,
+        "page_size": page_size,
+        "bytes": dest.stat().st_size,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "steps": steps,
+    }
+
+
+def _archive_database(backup_dir: Path, db_copy: Path, fmt: str) -> dict:
+    started = time.monotonic()
+    archive = backup_dir / f"database.tar.{fmt}"
+    with tarfile.open(archive, ARCHIVE_FORMATS[fmt]) as tar:
+        tar.add(db_copy, arcname=db_copy.name)
+    db_copy.unlink()
+    return {
+        "file": archive.name,
+        "format": fmt,
+        "bytes": archive.stat().st_size,
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def _write_manifest(backup_dir: Path, manifest: dict) -> str:
+    data = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+    tmp = backup_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, backup_dir / MANIFEST_NAME)
+    return sha256(data).hexdigest()
+
+
+def _no_progress(fraction: float, phase: str) -> None:
+    pass
+
+
+def create_backup(progress: Progress = _no_progress) -> str:
+    """Cria um snapshot; ``progress(fração, fase)`` é chamado ao longo da cópia."""
+    started = time.monotonic()
     BACKUP_DIR.mkdir(exist_ok=True)
+    previous_dir = latest_snapshot()
+    previous_manifest = load_manifest(previous_dir) if previous_dir else None
+    previous = {f["path"]: f for f in (previous_manifest or {}).get("files", [])}
+
     timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
     backup_dir = BACKUP_DIR / f"backup-{timestamp}"
     backup_dir.mkdir()
 
-    # copia banco
-    if DB_FILE.exists():
-        shutil.copy2(DB_FILE, backup_dir / "senai_autohub.db")
+    # banco: cópia online e consistente, opcionalmente compactada
+    database = None
+    source = database_path()
+    if source.exists():
+        db_copy = backup_dir / DB_BACKUP_NAME
+        database = _backup_database(source, db_copy, progress)
+        fmt = settings.BACKUP_ARCHIVE_FORMAT
+        if fmt in ARCHIVE_FORMATS:
+            database["archive"] = _archive_database(backup_dir, db_copy, fmt)
 
-    # copia uploads
+    # uploads: incremental em relação ao snapshot anterior
+    uploads_started = time.monotonic()
+    materials_dir = backup_dir / "materials"
+    materials_dir.mkdir()
+    uploads = {"files": [], "stats": {}}
     if UPLOADS_DIR.exists():
-        shutil.copytree(UPLOADS_DIR, backup_dir / "materials")
+        uploads = _snapshot_uploads(materials_dir, previous_dir, previous, progress)
+    uploads["stats"]["duration_seconds"] = round(time.monotonic() - uploads_started, 3)
 
-    # checksum simples dos arquivos de material
-    hasher = sha256()
-    materials_dir = backup_dir / "materials"
-    if materials_dir.exists():
-        for f in materials_dir.rglob("*"):
-            if f.is_file():
-                hasher.update(f.read_bytes())
-    (backup_dir / "checksum.txt").write_text(hasher.hexdigest())
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "base_snapshot": previous_dir.name if previous_dir else None,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "database": database,
+        "uploads": uploads["stats"],
+        "files": uploads["files"],
+    }
+    (backup_dir / "checksum.txt").write_text(_write_manifest(backup_dir, manifest))
+    progress(1.0, "concluído")
 
     return backup_dir.name
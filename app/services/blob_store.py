@@ -0,0 +1,127 @@
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import run_db
+from app.models.blob import Blob
+from app.services.upload_service import UPLOAD_DIR, StoredUpload, receive_upload
+
+# Armazenamento endereçado por conteúdo:
+#   uploads/materials/ab/cd/abcd…(sha256 completo)
+# Dois níveis de 256 diretórios mantêm cada pasta pequena. Cada Material que
+# aponta para o blob conta uma referência; conteúdo idêntico é gravado uma
+# única vez e nomes iguais não se sobrescrevem mais.
+#
+# A exclusão de material é lógica (is_active=False) e mantém a referência:
+# o arquivo continua no disco junto com o registro. Só a troca do arquivo
+# de um material (ou a remoção física da linha) libera a referência.
+#
+# Todo arquivo no disco tem linha em blobs: store_upload registra o blob
+# (sem referência) antes de o arquivo chegar ao destino. Se o Material não
+# chegar a ser gravado (sumiu durante o envio, erro, queda do processo), o
+# gc encontra a linha com ref_count 0 e apaga o arquivo.
+#
+# Upload x coleta: o gc só leva blobs sem referência com mais de
+# BLOB_GC_GRACE_SECONDS e apaga a linha (só se ainda sem referência) e o
+# arquivo dentro da mesma transação de escrita; acquire pega a referência
+# e só então confere o arquivo, então sempre enxerga o unlink já feito.
+
+
+def blob_path(sha256: str) -> Path:
+    return UPLOAD_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def _register(db: Session, sha256: str, size: int) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(Blob.__table__).values(sha256=sha256, size=size, ref_count=0)
+    db.execute(stmt.on_conflict_do_nothing())
+    db.commit()
+
+
+async def store_upload(db: Session, file: UploadFile) -> StoredUpload:
+    """Grava o upload no destino endereçado pelo hash; a linha do blob é
+    criada (sem referência) antes, para o gc enxergar o arquivo."""
+
+    async def register(sha256: str, size: int) -> None:
+        await run_db(db, _register, sha256, size)
+
+    return await receive_upload(file, blob_path, register)
+
+
+def acquire(db: Session, sha256: str, size: int) -> None:
+    """Soma uma referência ao blob (cria o registro se for novo).
+
+    Se o gc apagou o arquivo entre o upload e esta chamada, responde 409
+    e a transação (desfeita pelo chamador) não grava nada.
+    """
+    updated = (
+        db.query(Blob)
+        .filter(Blob.sha256 == sha256)
+        .update({Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(Blob(sha256=sha256, size=size, ref_count=1))
+        db.flush()
+    if not blob_path(sha256).is_file():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="O arquivo foi removido durante o envio. Envie novamente.",
+        )
+
+
+def release(db: Session, sha256: str | None) -> None:
+    """Remove uma referência; blobs sem referência são apagados pelo gc()."""
+    if not sha256:
+        return
+    db.query(Blob).filter(Blob.sha256 == sha256, Blob.ref_count > 0).update(
+        {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False
+    )
+
+
+def collect_garbage(db: Session) -> int:
+    """Apaga do disco e do banco os blobs sem nenhuma referência.
+
+    Cada candidato é apagado com ``ref_count <= 0`` na própria condição do
+    DELETE: um upload que pegou a referência depois da listagem mantém o
+    blob. O arquivo sai antes do commit, ainda com a transação de escrita.
+    Blobs registrados há menos de ``BLOB_GC_GRACE_SECONDS`` ficam.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)
+    unreferenced = (Blob.ref_count <= 0, Blob.created_at < cutoff)
+    candidates = [sha for (sha,) in db.query(Blob.sha256).filter(*unreferenced).all()]
+    # Encerra a leitura: os DELETEs abrem uma transação de escrita nova.
+    db.rollback()
+
+    removed = 0
+    try:
+        for sha256 in candidates:
+            deleted = (
+                db.query(Blob)
+                .filter(Blob.sha256 == sha256, *unreferenced)
+                .delete(synchronize_session=False)
+            )
+            if deleted:
+                blob_path(sha256).unlink(missing_ok=True)
+                removed += 1
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return removed
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Blobs sem referência removidos: {collect_garbage(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,105 @@
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.models.material import Material, MaterialType
+
+# Cache em memória (por processo) das contagens do catálogo. As rotas de
+# materiais chamam invalidate() após cada escrita; o TTL cobre escritas
+# feitas por outros workers.
+
+FacetCounts = Dict[str, int]
+
+_lock = threading.Lock()
+_version = 0
+_material_counts: Tuple[float, Dict[Tuple[str, bool], int]] | None = None
+_search_counts: "OrderedDict[str, Tuple[float, FacetCounts]]" = OrderedDict()
+
+SEARCH_CACHE_MAX_ENTRIES = 1024
+
+
+def catalog_version() -> int:
+    """Versão do catálogo; muda a cada escrita em materiais."""
+    return _version
+
+
+def invalidate() -> None:
+    global _version, _material_counts
+    with _lock:
+        _version += 1
+        _material_counts = None
+        _search_counts.clear()
+
+
+def material_counts(db: Session) -> Dict[Tuple[str, bool], int]:
+    """Contagem de materiais por (tipo, ativo), em uma única consulta agrupada."""
+    global _material_counts
+    now = time.monotonic()
+    cached = _material_counts
+    if cached and now - cached[0] < settings.CATALOG_COUNT_TTL_SECONDS:
+        return cached[1]
+
+    version = _version
+    rows = (
+        db.query(Material.type, Material.is_active, func.count(Material.id))
+        .group_by(Material.type, Material.is_active)
+        .all()
+    )
+    counts = {(t.value, bool(active)): n for t, active, n in rows}
+    with _lock:
+        # Não grava resultado calculado antes de uma invalidação concorrente.
+        if version == _version:
+            _material_counts = (now, counts)
+    return counts
+
+
+def _empty_facets() -> FacetCounts:
+    return {t.value: 0 for t in MaterialType}
+
+
+def facet_counts(db: Session, key: str, query_factory: Callable[[], Query]) -> FacetCounts:
+    """Contagem de materiais ativos por tipo para a busca de chave ``key``.
+
+    Sem busca (``key`` vazia), vem do cache por tipo; com busca, de um cache
+    de TTL curto indexado por ``key`` (search_service.search_key).
+    ``query_factory`` monta a consulta já filtrada pela busca (sem o filtro
+    de tipos) e só é chamada em cache miss.
+    """
+    if not key:
+        facets = _empty_facets()
+        for (type_value, active), n in material_counts(db).items():
+            if active:
+                facets[type_value] = n
+        return facets
+
+    now = time.monotonic()
+    with _lock:
+        cached = _search_counts.get(key)
+        if cached and now - cached[0] < settings.SEARCH_COUNT_TTL_SECONDS:
+            _search_counts.move_to_end(key)
+            return cached[1]
+
+    version = _version
+    rows = (
+        query_factory()
+        .with_entities(Material.type, func.count(Material.id))
+        .group_by(Material.type)
+        .all()
+    )
+    facets = _empty_facets()
+    for type_value, n in rows:
+        facets[type_value.value] = n
+
+    with _lock:
+        if version == _version:
+            _search_counts[key] = (now, facets)
+            _search_counts.move_to_end(key)
+            while len(_search_counts) > SEARCH_CACHE_MAX_ENTRIES:
+                _search_counts.popitem(last=False)
+    return facets
@@ -0,0 +1,282 @@
+
+import mimetypes
+import os
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.upload_service import UPLOAD_DIR
+
+CHUNK_SIZE = 256 * 1024
+# Mais intervalos que isso num único Range é tratado como abuso: envia tudo.
+MAX_RANGES = 16
+# Tipos passivos que podem abrir no próprio navegador. Nada que execute
+# script: SVG, HTML e XML (mesmo com extensão "de imagem") vão como anexo.
+INLINE_PREFIXES = ("video/", "audio/")
+INLINE_TYPES = frozenset({
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "image/avif",
+    "image/bmp",
+    "application/pdf",
+})
+# Em todo download: o navegador não adivinha o tipo e, se abrir o arquivo
+# inline, ele roda numa origem isolada, sem scripts nem acesso a cookies.
+DOWNLOAD_SECURITY_HEADERS = {
+    "x-content-type-options": "nosniff",
+    "content-security-policy": "sandbox",
+}
+
+ByteRange = Tuple[int, int]  # início e fim, inclusivos
+
+
+def media_type_for(filename: str) -> str:
+    media_type, _ = mimetypes.guess_type(filename)
+    return media_type or "application/octet-stream"
+
+
+def content_disposition(filename: str, media_type: str) -> str:
+    inline = media_type in INLINE_TYPES or media_type.startswith(INLINE_PREFIXES)
+    kind = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{kind}; filename*=utf-8''{quoted}"
+    return f'{kind}; filename="{filename}"'
+
+
+def make_etag(sha256: Optional[str], stat: os.stat_result) -> str:
+    # Forte quando há hash do conteúdo; fraco (tamanho+mtime) em legados.
+    if sha256:
+        return f'"{sha256}"'
+    return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_list(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _weak_equal(a: str, b: str) -> bool:
+    return a.removeprefix("W/") == b.removeprefix("W/")
+
+
+def not_modified(request: Request, etag: str, mtime: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = _etag_list(if_none_match)
+        return "*" in tags or any(_weak_equal(tag, etag) for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return mtime <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_allows(request: Request, etag: str, last_modified: str) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', "W/")):
+        # If-Range exige comparação forte
+        return not etag.startswith("W/") and if_range == etag
+    return if_range == last_modified
+
+
+def parse_range(header: str, size: int) -> Optional[List[ByteRange]]:
+    """Interpreta ``Range: bytes=...``.
+
+    Retorna ``None`` quando o cabeçalho deve ser ignorado (resposta 200
+    completa) e lista vazia quando nenhum intervalo é satisfazível (416).
+    Intervalos sobrepostos ou adjacentes são unidos.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges: List[ByteRange] = []
+    parts = [p.strip() for p in spec.split(",")]
+    if len(parts) > MAX_RANGES:
+        return None
+    for part in parts:
+        first, sep, last = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if first == "":
+                length = int(last)
+                if length <= 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+        if end is not None and start > end:
+            return None
+        if start >= size:
+            continue
+        if end is None:
+            end = size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    ranges.sort()
+    merged: List[ByteRange] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """Envia o arquivo inteiro, um intervalo (206) ou vários
+    (multipart/byteranges), lendo em blocos de ``CHUNK_SIZE``."""
+
+    def __init__(
+        self,
+        path: Path,
+        size: int,
+        media_type: str,
+        headers: dict,
+        ranges: Optional[List[ByteRange]] = None,
+    ):
+        self.path = path
+        self.ranges = ranges
+        self.part_headers: List[bytes] = []
+        self.boundary = None
+        status_code = 200
+
+        if ranges:
+            status_code = 206
+            if len(ranges) == 1:
+                start, end = ranges[0]
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+                content_length = end - start + 1
+            else:
+                self.boundary = secrets.token_hex(16)
+                content_length = 0
+                for start, end in ranges:
+                    part = (
+                        f"--{self.boundary}\r\n"
+                        f"Content-Type: {media_type}\r\n"
+                        f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                    ).encode("latin-1")
+                    self.part_headers.append(part)
+                    content_length += len(part) + (end - start + 1) + 2
+                content_length += len(self._closing())
+                media_type = f"multipart/byteranges; boundary={self.boundary}"
+        else:
+            content_length = size
+
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(content_length)
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+    async def _send_span(self, f, send: Send, start: int, end: int) -> None:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            if self.boundary:
+                for part, (start, end) in zip(self.part_headers, self.ranges):
+                    await send({"type": "http.response.body", "body": part, "more_body": True})
+                    await self._send_span(f, send, start, end)
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+                await send({"type": "http.response.body", "body": self._closing(), "more_body": True})
+            elif self.ranges:
+                await self._send_span(f, send, *self.ranges[0])
+            else:
+                await self._send_span(f, send, 0, int(self.headers["content-length"]) - 1)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _offload_headers(path: Path) -> dict:
+    if settings.DOWNLOAD_OFFLOAD == "x-accel-redirect":
+        relative = path.resolve().relative_to(UPLOAD_DIR.resolve()).as_posix()
+        return {"x-accel-redirect": settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative)}
+    return {"x-sendfile": str(path.resolve())}
+
+
+async def serve_file(
+    request: Request,
+    path: str,
+    filename: str,
+    sha256: Optional[str] = None,
+) -> Response:
+    """Download com validadores (ETag/Last-Modified, 304), Range (206/416)
+    e, se configurado, entrega delegada ao proxy (X-Accel-Redirect/X-Sendfile)."""
+    file_path = Path(path)
+    try:
+        stat = await run_in_threadpool(os.stat, file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Arquivo não está mais disponível.")
+
+    media_type = media_type_for(filename)
+    etag = make_etag(sha256, stat)
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": "private, no-cache",
+        "accept-ranges": "bytes",
+        **DOWNLOAD_SECURITY_HEADERS,
+    }
+
+    if not_modified(request, etag, int(stat.st_mtime)):
+        return Response(status_code=304, headers=headers)
+
+    headers["content-disposition"] = content_disposition(filename, media_type)
+
+    if settings.DOWNLOAD_OFFLOAD:
+        # O proxy lê o arquivo (e trata Range); o worker só devolve cabeçalhos.
+        headers.update(_offload_headers(file_path))
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_allows(request, etag, last_modified):
+        ranges = parse_range(range_header, stat.st_size)
+        if ranges == []:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{stat.st_size}"},
+            )
+
+    return RangeFileResponse(file_path, stat.st_size, media_type, headers, ranges)
+
+
+def is_continuation(request: Request) -> bool:
+    """Range que não começa no byte 0 (ex.: avanço no vídeo)."""
+    range_header = request.headers.get("range", "")
+    _, _, spec = range_header.partition("=")
+    return bool(spec) and not spec.strip().startswith("0-")
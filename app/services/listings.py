@@ -0,0 +1,153 @@
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.core.pagination import Page, SortKey, paginate
+from app.models.material import Material
+from app.models.user import User, UserRole
+from app.services import catalog_cache
+from app.services.search_service import apply_search, search_key
+
+# Camada de leitura das listagens: seleciona só as colunas exibidas, junta o
+# nome do autor na mesma consulta e devolve linhas compactas (sem entidades
+# ORM no identity map e sem lazy-load por linha).
+
+
+class MaterialRow:
+    __slots__ = ("id", "title", "description", "type", "author_name", "created_at")
+
+    def __init__(self, id, title, description, type, author_name, created_at):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.type = type.value
+        self.author_name = author_name
+        self.created_at = created_at
+
+
+class UserRow:
+    __slots__ = ("id", "name", "email", "role", "is_active", "created_at")
+
+    def __init__(self, id, name, email, role, is_active, created_at):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.role = role.value
+        self.is_active = is_active
+        self.created_at = created_at
+
+
+MATERIAL_COLUMNS = (
+    Material.id,
+    Material.title,
+    func.coalesce(Material.description, ""),
+    Material.type,
+    func.coalesce(User.name, "Desconhecido"),
+    Material.created_at,
+)
+
+USER_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.role,
+    User.is_active,
+    User.created_at,
+)
+
+
+def material_listing(db: Session) -> Query:
+    """Consulta base de materiais ativos com o nome do autor."""
+    return (
+        db.query(*MATERIAL_COLUMNS)
+        .select_from(Material)
+        .outerjoin(User, User.id == Material.author_id)
+        .filter(Material.is_active == True)
+    )
+
+
+def parse_types(types: Optional[str]) -> List[str]:
+    return [t for t in (types or "").split(",") if t]
+
+
+def catalog_page(
+    db: Session, q: Optional[str], types: Optional[str], cursor: Optional[str], limit: int
+) -> Tuple[Dict[str, int], int, Page]:
+    """Página do catálogo (home e API): contagens por tipo, total e itens."""
+    query = material_listing(db)
+    sort_keys = [SortKey(Material.created_at), SortKey(Material.id)]
+
+    if q:
+        # FTS5 com ranking por relevância; cai no ilike se indisponível.
+        query, score = apply_search(query, q)
+        if score is not None:
+            sort_keys.insert(0, SortKey(score, descending=False))
+
+    # Contagens por tipo vêm do cache; o total sai delas sem novo COUNT.
+    search_query = query
+    facets = catalog_cache.facet_counts(db, search_key(q), lambda: search_query)
+
+    selected = parse_types(types)
+    if selected:
+        query = query.filter(Material.type.in_(selected))
+
+    total_items = sum(facets.get(t, 0) for t in (selected or facets))
+    page = paginate(query, sort_keys, cursor, limit)
+    return facets, total_items, page
+
+
+def material_metadata(db: Session, material_id: int) -> Optional[dict]:
+    """Metadados de um material ativo, sem carregar a entidade."""
+    row = (
+        db.query(
+            Material.id,
+            Material.title,
+            func.coalesce(Material.description, ""),
+            Material.type,
+            Material.source_type,
+            Material.author_id,
+            func.coalesce(User.name, "Desconhecido"),
+            Material.original_filename,
+            Material.file_size,
+            Material.file_sha256,
+            Material.external_url,
+            Material.created_at,
+            Material.updated_at,
+        )
+        .select_from(Material)
+        .outerjoin(User, User.id == Material.author_id)
+        .filter(Material.id == material_id, Material.is_active == True)
+        .first()
+    )
+    if row is None:
+        return None
+    (id, title, description, type, source_type, author_id, author_name,
+     original_filename, file_size, file_sha256, external_url, created_at, updated_at) = row
+    return {
+        "id": id,
+        "title": title,
+        "description": description,
+        "type": type.value,
+        "source_type": source_type.value,
+        "author": {"id": author_id, "name": author_name},
+        "original_filename": original_filename,
+        "file_size": file_size,
+        "sha256": file_sha256,
+        "external_url": external_url,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "open_url": f"/materials/{id}/open",
+    }
+
+
+def material_rows(rows: Iterable[tuple]) -> List[MaterialRow]:
+    return [MaterialRow(*row) for row in rows]
+
+
+def user_rows(db: Session, role: Optional[UserRole] = None) -> List[UserRow]:
+    query = db.query(*USER_COLUMNS)
+    if role is not None:
+        query = query.filter(User.role == role)
+    return [UserRow(*row) for row in query.order_by(User.created_at.desc())]
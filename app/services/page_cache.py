@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional, Tuple
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.services import catalog_cache
+
+# Cache da página inicial inteira para visitantes anônimos (por processo).
+# A entrada vale enquanto a versão do catálogo não mudar; o TTL cobre
+# escritas feitas por outros workers. O ETag é o hash do corpo, então um
+# visitante que já tem a página recebe 304 sem corpo.
+
+_lock = threading.Lock()
+_pages: "OrderedDict[Tuple, CachedPage]" = OrderedDict()
+
+
+class CachedPage:
+    __slots__ = ("version", "created", "body", "etag")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.created = time.monotonic()
+        self.body = body
+        self.etag = f'"{sha256(body).hexdigest()[:32]}"'
+
+
+def home_key(q: Optional[str], types: Optional[str], cursor: Optional[str]) -> Tuple:
+    selected = tuple(sorted({t for t in (types or "").split(",") if t}))
+    # Só espaços são normalizados: o termo aparece na caixa de busca da página.
+    return (" ".join((q or "").split()), selected, cursor or "")
+
+
+def get(key: Tuple) -> Optional[CachedPage]:
+    now = time.monotonic()
+    with _lock:
+        page = _pages.get(key)
+        if page is None:
+            return None
+        if page.version != catalog_cache.catalog_version() or now - page.created >= settings.HOME_CACHE_TTL_SECONDS:
+            del _pages[key]
+            return None
+        _pages.move_to_end(key)
+        return page
+
+
+def put(key: Tuple, version: int, body: bytes) -> CachedPage:
+    """Guarda o corpo renderizado na versão ``version`` (lida antes das consultas)."""
+    page = CachedPage(version, body)
+    with _lock:
+        # Renderizado antes de uma invalidação concorrente: não guarda.
+        if version == catalog_cache.catalog_version():
+            _pages[key] = page
+            _pages.move_to_end(key)
+            while len(_pages) > settings.HOME_CACHE_MAX_ENTRIES:
+                _pages.popitem(last=False)
+    return page
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
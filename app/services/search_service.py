@@ -0,0 +1,183 @@
+
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    bindparam,
+    false,
+    func,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import ColumnElement
+
+from app.core.config import settings
+from app.models.material import Material
+
+FTS_TABLE = "materials_fts"
+
+# Pesos do bm25 por coluna: título pesa mais que descrição.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Tabela virtual FTS5 declarada fora do Base.metadata para que o
+# create_all não tente criá-la como tabela comum.
+_fts_metadata = MetaData()
+fts_table = Table(
+    FTS_TABLE,
+    _fts_metadata,
+    Column("rowid", Integer),
+    Column("title", Text),
+    Column("description", Text),
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_fts_enabled = False
+
+
+def fts_enabled() -> bool:
+    return _fts_enabled
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Cria o índice FTS5 (se suportado) e popula na primeira execução."""
+    global _fts_enabled
+
+    if settings.SEARCH_BACKEND != "fts" or engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        try:
+            # remove_diacritics 2: "programacao" encontra "Programação".
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(title, description, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+        except Exception:
+            # SQLite compilado sem FTS5: usa o caminho ilike.
+            _fts_enabled = False
+            return False
+
+    _fts_enabled = True
+    if not exists:
+        with Session(bind=engine) as db:
+            rebuild_search_index(db)
+            db.commit()
+    return True
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Recria o índice inteiro a partir da tabela de materiais ativos."""
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = db.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+        "SELECT id, title, COALESCE(description, '') FROM materials WHERE is_active = 1"
+    ))
+    return result.rowcount or 0
+
+
+def index_material(db: Session, material: Material) -> None:
+    """Sincroniza um material no índice (chamar antes do commit)."""
+    if not _fts_enabled:
+        return
+    remove_material(db, material.id)
+    if material.is_active is False:
+        return
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (:id, :title, :description)"),
+        {"id": material.id, "title": material.title, "description": material.description or ""},
+    )
+
+
+def remove_material(db: Session, material_id: int) -> None:
+    if not _fts_enabled:
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": material_id})
+
+
+def build_match_expression(q: str) -> Optional[str]:
+    """Converte a busca do usuário em uma expressão MATCH segura.
+
+    Cada palavra vira um termo entre aspas com prefixo (``"aula"*``), o que
+    neutraliza a sintaxe do FTS5 digitada pelo usuário.
+    """
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def search_key(q: Optional[str]) -> str:
+    """Chave de cache da busca ``q``: exatamente o que apply_search leva ao
+    banco (a expressão MATCH ou o padrão do ilike); ``""`` sem busca.
+
+    No ilike o termo entra cru: maiúsculas fora do ASCII e espaços repetidos
+    mudam o resultado, então só buscas idênticas compartilham a chave.
+    """
+    q = (q or "").strip()
+    if not q:
+        return ""
+    if not _fts_enabled:
+        return f"like:{q}"
+    return f"fts:{build_match_expression(q) or ''}"
+
+
+def apply_search(query: Query, q: str) -> Tuple[Query, Optional[ColumnElement]]:
+    """Filtra a consulta de materiais pelo termo ``q``.
+
+    Retorna a consulta e a coluna de relevância (bm25, menor é melhor) para
+    ordenação, ou ``None`` quando a busca cai no caminho ilike.
+    """
+    q = q.strip()
+    if not q:
+        return query, None
+
+    if not _fts_enabled:
+        like = f"%{q}%"
+        return query.filter(
+            (Material.title.ilike(like)) | (Material.description.ilike(like))
+        ), None
+
+    match = build_match_expression(q)
+    if match is None:
+        return query.filter(false()), None
+
+    fts_name = literal_column(FTS_TABLE)
+    hits = (
+        select(
+            fts_table.c.rowid.label("material_id"),
+            func.bm25(fts_name, TITLE_WEIGHT, DESCRIPTION_WEIGHT).label("score"),
+        )
+        .where(fts_name.op("MATCH")(bindparam("fts_match", match)))
+        .subquery()
+    )
+    return query.join(hits, hits.c.material_id == Material.id), hits.c.score
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal, engine
+
+    if ensure_search_index(engine):
+        db = SessionLocal()
+        try:
+            total = rebuild_search_index(db)
+            db.commit()
+            print(f"Índice de busca reconstruído: {total} materiais.")
+        finally:
+            db.close()
+    else:
+        print("FTS5 indisponível; a busca usa o caminho ilike.")
@@ -0,0 +1,149 @@
+import gzip
+import json
+import mimetypes
+import os
+import re
+import shutil
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Assets com nome por conteúdo. `python -m app.services.static_assets` copia
+# cada arquivo de static/ para static/dist/ como nome.<hash>.ext, grava a
+# variante .gz dos formatos de texto e o manifest.json (original -> gerado).
+# Os templates usam asset_url(); arquivos com hash no nome nunca mudam de
+# conteúdo, então são servidos com Cache-Control immutable. O manifest (e
+# qualquer outro nome sem hash em dist/) é revalidado a cada uso.
+
+STATIC_DIR = Path("static")
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+STATIC_URL = "/static/"
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+# nome.<12 hex>.ext, como gerado por _fingerprint (opcionalmente + .gz)
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{12}(\.[^./]+)?(\.gz)?$")
+
+_manifest: Optional[Dict[str, str]] = None
+
+
+def _fingerprint(data: bytes, rel: Path) -> Path:
+    digest = sha256(data).hexdigest()[:12]
+    return rel.with_name(f"{rel.stem}.{digest}{rel.suffix}")
+
+
+def build(source: Path = STATIC_DIR, dist: Path = DIST_DIR) -> Dict[str, str]:
+    """Gera dist/ e o manifest. Builds anteriores ficam: páginas já abertas
+    continuam achando os arquivos que referenciam."""
+    manifest: Dict[str, str] = {}
+    for path in sorted(source.rglob("*")):
+        if not path.is_file() or path.name.startswith(".") or dist in path.parents:
+            continue
+        rel = path.relative_to(source)
+        data = path.read_bytes()
+        target_rel = _fingerprint(data, rel)
+        target = dist / target_rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            shutil.copyfile(path, target)
+
+        if rel.suffix in COMPRESSIBLE:
+            # mtime=0: o .gz é idêntico entre builds do mesmo conteúdo.
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                Path(f"{target}.gz").write_bytes(compressed)
+
+        manifest[rel.as_posix()] = target_rel.as_posix()
+
+    tmp = dist / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, dist / "manifest.json")
+    return manifest
+
+
+def load_manifest() -> Dict[str, str]:
+    global _manifest
+    try:
+        _manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # Sem build: asset_url() aponta para os arquivos originais.
+        _manifest = {}
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """URL do asset: versão com hash se houver build, senão o original."""
+    manifest = _manifest if _manifest is not None else load_manifest()
+    path = path.lstrip("/")
+    built = manifest.get(path)
+    if built:
+        return f"{STATIC_URL}dist/{built}"
+    return f"{STATIC_URL}{path}"
+
+
+def _is_fingerprinted(path: str) -> bool:
+    return FINGERPRINTED.search(path.rsplit("/", 1)[-1]) is not None
+
+
+def _accepts_gzip(headers: Headers) -> bool:
+    for coding in headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles que, em dist/, entrega o .gz quando o cliente aceita e
+    marca como immutable os arquivos com hash no nome."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        posix_path = path.replace("\\", "/")
+        if not posix_path.startswith("dist/"):
+            return await super().get_response(path, scope)
+        if not _is_fingerprinted(posix_path):
+            # manifest.json: muda a cada build com o mesmo nome
+            response = await super().get_response(path, scope)
+            if response.status_code in (200, 304):
+                response.headers["cache-control"] = "no-cache"
+            return response
+
+        request_headers = Headers(scope=scope)
+        if not path.endswith(".gz") and _accepts_gzip(request_headers):
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, f"{path}.gz")
+            if stat_result is not None:
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=media_type,
+                    headers={
+                        "content-encoding": "gzip",
+                        "vary": "Accept-Encoding",
+                        "cache-control": IMMUTABLE,
+                    },
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = IMMUTABLE
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+if __name__ == "__main__":
+    built = build()
+    print(f"Assets gerados em {DIST_DIR}: {len(built)}")
+    for original, target in sorted(built.items()):
+        gz = " (+gz)" if Path(f"{DIST_DIR / target}.gz").exists() else ""
+        print(f"  {original} -> {target}{gz}")
@@ -0,0 +1,216 @@
+import codecs
+import csv
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core import password_hashing
+from app.core.config import settings
+from app.db.session import run_db
+from app.models.user import User, UserRole
+
+# Importação de alunos a partir de um CSV (colunas nome, email, senha).
+#
+# O arquivo é lido em blocos de STUDENT_IMPORT_CHUNK_ROWS linhas: cada bloco
+# custa um SELECT ... IN para os e-mails (na sessão de leitura), um lote de
+# hashes no pool de processos e um único INSERT em lote, a única etapa que
+# usa a sessão de escrita. Só o bloco atual, os e-mails já vistos
+# e o relatório de erros ficam em memória.
+
+HEADER_ALIASES = {
+    "nome": "name",
+    "name": "name",
+    "email": "email",
+    "e-mail": "email",
+    "senha": "password",
+    "password": "password",
+}
+REQUIRED_COLUMNS = ("name", "email", "password")
+
+NAME_MAX = User.__table__.c.name.type.length
+EMAIL_MAX = User.__table__.c.email.type.length
+
+
+class RowError:
+    __slots__ = ("line", "email", "message")
+
+    def __init__(self, line: int, email: str, message: str):
+        self.line = line
+        self.email = email
+        self.message = message
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.rows = 0
+        self.errors: List[RowError] = []
+        self.fatal: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.fatal is None and not self.errors
+
+
+class _Row:
+    __slots__ = ("line", "name", "email", "password")
+
+    def __init__(self, line: int, name: str, email: str, password: str):
+        self.line = line
+        self.name = name
+        self.email = email
+        self.password = password
+
+
+def _text_lines(raw: BinaryIO) -> Iterator[str]:
+    # Decodificação incremental: o arquivo nunca é lido por inteiro.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while True:
+        block = raw.read(settings.UPLOAD_CHUNK_SIZE)
+        parts = (pending + decoder.decode(block, final=not block)).split("\n")
+        pending = parts.pop()
+        for part in parts:
+            yield part + "\n"
+        if not block:
+            break
+    if pending:
+        yield pending
+
+
+def _open_reader(raw: BinaryIO) -> Tuple[Optional[Iterator[List[str]]], Dict[str, int], Optional[str]]:
+    reader = csv.reader(_text_lines(raw))
+    header = next(reader, None)
+    if header is None:
+        return None, {}, "Arquivo vazio."
+
+    columns: Dict[str, int] = {}
+    for index, title in enumerate(header):
+        key = HEADER_ALIASES.get(title.strip().lower())
+        if key and key not in columns:
+            columns[key] = index
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        return None, {}, "Cabeçalho deve conter as colunas nome, email e senha."
+    return reader, columns, None
+
+
+def _read_chunk(reader, size: int) -> List[Tuple[int, List[str]]]:
+    chunk = []
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        chunk.append((reader.line_num, values))
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+def _parse(line: int, values: List[str], columns: Dict[str, int]) -> Tuple[_Row, Optional[str]]:
+    def value(key: str) -> str:
+        index = columns[key]
+        return values[index] if index < len(values) else ""
+
+    name = value("name").strip()
+    email = value("email").strip().lower()
+    password = value("password")
+
+    row = _Row(line, name, email, password)
+    if not name or not email or not password:
+        return row, "Nome, e-mail e senha são obrigatórios."
+    if len(name) > NAME_MAX:
+        return row, f"Nome com mais de {NAME_MAX} caracteres."
+    if len(email) > EMAIL_MAX or "@" not in email or " " in email:
+        return row, "E-mail inválido."
+    return row, None
+
+
+def _existing_emails(db: Session, emails: List[str]) -> Set[str]:
+    if not emails:
+        return set()
+    rows = db.query(User.email).filter(User.email.in_(emails)).all()
+    return {email for (email,) in rows}
+
+
+def _insert_students(db: Session, rows: List[dict]) -> Set[str]:
+    """INSERT em lote; devolve os e-mails que outro cadastro gravou antes."""
+    if not rows:
+        return set()
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(User.__table__).on_conflict_do_nothing(index_elements=["email"])
+    db.execute(stmt, rows)
+
+    # Hashes têm salt próprio: quem ficou com outro hash perdeu a corrida.
+    ours = {row["email"]: row["password_hash"] for row in rows}
+    stored = db.query(User.email, User.password_hash).filter(User.email.in_(list(ours))).all()
+    db.commit()
+    return {email for email, password_hash in stored if ours[email] != password_hash}
+
+
+async def _import_chunk(db, read_db, chunk, columns, seen: Set[str], report: ImportReport) -> None:
+    rows: List[_Row] = []
+    for line, values in chunk:
+        report.rows += 1
+        row, error = _parse(line, values, columns)
+        if error:
+            report.errors.append(RowError(line, row.email, error))
+        elif row.email in seen:
+            report.errors.append(RowError(line, row.email, "E-mail repetido no arquivo."))
+        else:
+            seen.add(row.email)
+            rows.append(row)
+
+    existing = await run_db(read_db, _existing_emails, [row.email for row in rows])
+    fresh = []
+    for row in rows:
+        if row.email in existing:
+            report.errors.append(RowError(row.line, row.email, "Já existe um usuário com esse e-mail."))
+        else:
+            fresh.append(row)
+
+    hashes = await password_hashing.hash_passwords([row.password for row in fresh])
+    values = [
+        {
+            "name": row.name,
+            "email": row.email,
+            "password_hash": password_hash,
+            "role": UserRole.STUDENT,
+            "is_active": True,
+        }
+        for row, password_hash in zip(fresh, hashes)
+    ]
+    lost = await run_db(db, _insert_students, values)
+    for row in fresh:
+        if row.email in lost:
+            report.errors.append(RowError(row.line, row.email, "Já existe um usuário com esse e-mail."))
+    report.created += len(fresh) - len(lost)
+
+
+async def import_students(file: UploadFile, db, read_db) -> ImportReport:
+    """Importa alunos de um CSV em blocos, sem carregar o arquivo inteiro.
+
+    ``db`` (escrita) só é usada no INSERT de cada bloco; a checagem de
+    duplicados vai em ``read_db``, antes dos hashes."""
+    report = ImportReport()
+    try:
+        reader, columns, error = await run_in_threadpool(_open_reader, file.file)
+        if error:
+            report.fatal = error
+            return report
+
+        seen: Set[str] = set()
+        while True:
+            chunk = await run_in_threadpool(_read_chunk, reader, settings.STUDENT_IMPORT_CHUNK_ROWS)
+            if not chunk:
+                break
+            await _import_chunk(db, read_db, chunk, columns, seen, report)
+    except UnicodeDecodeError:
+        report.fatal = "O arquivo deve estar em UTF-8."
+    except csv.Error as exc:
+        report.fatal = f"CSV inválido: {exc}"
+    return report
@@ -0,0 +1,108 @@
+
+import os
+import tempfile
+from hashlib import sha256
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+UPLOAD_DIR = Path("uploads/materials")
+# Mesma partição do destino, para o os.replace final ser atômico.
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+
+
+class StoredUpload:
+    __slots__ = ("path", "sha256", "size", "original_filename")
+
+    def __init__(self, path: Path, sha256: str, size: int, original_filename: str):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.original_filename = original_filename
+
+
+def safe_filename(filename: str | None) -> str:
+    name = filename or "material"
+    return name.replace("..", "_").replace("/", "_").replace("\\", "_")
+
+
+def too_large() -> HTTPException:
+    limit_mb = settings.MAX_UPLOAD_BYTES // (1024 * 1024)
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo excede o limite de {limit_mb} MB.",
+    )
+
+
+def _open_temp() -> tuple[BinaryIO, Path]:
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=INCOMING_DIR, suffix=".part")
+    return os.fdopen(fd, "wb"), Path(name)
+
+
+def _write_chunk(out: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+def _finish(out: BinaryIO, tmp_path: Path, dest: Path) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+    if dest.exists():
+        # Conteúdo já armazenado (destinos endereçados por hash).
+        tmp_path.unlink()
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, dest)
+
+
+def _discard(out: BinaryIO, tmp_path: Path) -> None:
+    out.close()
+    tmp_path.unlink(missing_ok=True)
+
+
+async def receive_upload(
+    file: UploadFile,
+    dest_for: Callable[[str], Path],
+    before_rename: Optional[Callable[[str, int], Awaitable[None]]] = None,
+) -> StoredUpload:
+    """Copia o upload em blocos para um temporário, calculando SHA-256 e
+    tamanho, e renomeia atomicamente para ``dest_for(sha256)``.
+
+    ``before_rename(sha256, size)``, se informado, roda antes da renomeação;
+    se falhar, o temporário é descartado e nada chega ao destino.
+
+    Nenhum bloco maior que ``UPLOAD_CHUNK_SIZE`` fica em memória e a E/S de
+    disco roda no threadpool. Uploads acima de ``MAX_UPLOAD_BYTES`` geram 413.
+    """
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise too_large()
+
+    original = safe_filename(file.filename)
+    hasher = sha256()
+    size = 0
+
+    out, tmp_path = await run_in_threadpool(_open_temp)
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > settings.MAX_UPLOAD_BYTES:
+                raise too_large()
+            await run_in_threadpool(_write_chunk, out, hasher, chunk)
+        dest = dest_for(hasher.hexdigest())
+        if before_rename is not None:
+            await before_rename(hasher.hexdigest(), size)
+        await run_in_threadpool(_finish, out, tmp_path, dest)
+    except BaseException:
+        await run_in_threadpool(_discard, out, tmp_path)
+        raise
+
+    return StoredUpload(dest, hasher.hexdigest(), size, original)
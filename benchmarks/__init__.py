@@ -0,0 +1,2 @@
+# Suíte de benchmarks: dados sintéticos com semente fixa e cenários que
+# chamam o app ASGI no próprio processo. Ver `python -m benchmarks --help`.
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from benchmarks import datagen, results, scenarios, workspace
+
+# python -m benchmarks seed --scale large
+# python -m benchmarks run --requests 2000 --concurrency 32
+# python -m benchmarks compare results/run-A.json results/run-B.json
+
+
+def _scale(args) -> dict:
+    scale = dict(datagen.SCALES[args.scale])
+    for key in ("users", "materials", "access_logs", "invites"):
+        value = getattr(args, key)
+        if value is not None:
+            scale[key] = value
+    return scale
+
+
+def cmd_seed(args) -> None:
+    workdir = workspace.prepare(args.workdir)
+    datagen.seed(workdir, _scale(args), args.seed)
+
+
+def cmd_run(args) -> None:
+    workdir = workspace.prepare(args.workdir)
+    dataset = datagen.load_dataset(workdir)
+
+    from app.main import app
+    from benchmarks import asgi_client
+
+    workspace.redirect_backup_dirs(workdir)
+    names = args.scenario or list(scenarios.SCENARIOS)
+
+    async def main():
+        async with asgi_client.Lifespan(app):
+            return await scenarios.run_all(
+                app, dataset, names, args.requests, args.concurrency, args.seed, args.backup_iterations,
+            )
+
+    run = {
+        "environment": results.environment(dataset, {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "backup_iterations": args.backup_iterations,
+            "scenarios": names,
+        }),
+        "scenarios": asyncio.run(main()),
+    }
+    print(f"Resultado salvo em {results.save(run, args.output)}")
+
+
+def cmd_compare(args) -> None:
+    for line in results.compare(results.load(args.base), results.load(args.other)):
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks do Senai AutoHub.")
+    parser.add_argument("--workdir", type=Path, default=workspace.DEFAULT_WORKDIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="gera o banco sintético")
+    seed.add_argument("--scale", choices=sorted(datagen.SCALES), default="small")
+    seed.add_argument("--seed", type=int, default=42)
+    for key in ("users", "materials", "access-logs", "invites"):
+        seed.add_argument(f"--{key}", type=int, dest=key.replace("-", "_"))
+    seed.set_defaults(func=cmd_seed)
+
+    run = sub.add_parser("run", help="executa os cenários e grava o JSON")
+    run.add_argument("--scenario", action="append", choices=scenarios.SCENARIOS,
+                     help="repetível; padrão: todos")
+    run.add_argument("--requests", type=int, default=500, help="requisições por cenário")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--backup-iterations", type=int, default=3)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--output", type=Path)
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="compara dois resultados")
+    compare.add_argument("base", type=Path)
+    compare.add_argument("other", type=Path)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
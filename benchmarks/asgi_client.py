@@ -0,0 +1,104 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Cliente ASGI mínimo: chama o app no mesmo processo, sem socket nem httpx,
+# para que a medição seja só do app. O corpo da resposta é consumido e
+# descartado (só o tamanho é guardado).
+
+
+class Result:
+    __slots__ = ("status", "headers", "size")
+
+    def __init__(self, status: int, headers: Dict[str, str], size: int):
+        self.status = status
+        self.headers = headers
+        self.size = size
+
+
+async def request(
+    app,
+    method: str,
+    url: str,
+    headers: Optional[List[Tuple[str, str]]] = None,
+    body: bytes = b"",
+) -> Result:
+    parts = urlsplit(url)
+    raw_headers = [(b"host", b"bench")]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in headers or ()]
+    if body:
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    sent = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    status = 0
+    response_headers: Dict[str, str] = {}
+    size = 0
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for k, v in message.get("headers", ()):
+                response_headers[k.decode().lower()] = v.decode()
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnect.set()
+    return Result(status, response_headers, size)
+
+
+class Lifespan:
+    """Dispara os eventos de startup/shutdown do app (on_event)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def _run(self):
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        await self.app(scope, self._inbox.get, self._outbox.put)
+
+    async def _expect(self, event: str) -> None:
+        message = await self._outbox.get()
+        if message["type"] != f"{event}.complete":
+            raise RuntimeError(f"{event} falhou: {message.get('message', message)}")
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        await self._inbox.put({"type": "lifespan.startup"})
+        await self._expect("lifespan.startup")
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._inbox.put({"type": "lifespan.shutdown"})
+        await self._expect("lifespan.shutdown")
+        await self._task
@@ -0,0 +1,215 @@
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+# Gerador de dados sintéticos com semente fixa: a mesma escala e a mesma
+# semente produzem exatamente o mesmo banco. Todos os usuários compartilham
+# uma única senha (um pbkdf2 por usuário levaria horas em 50 mil contas).
+
+SCALES = {
+    "small": {"users": 1000, "materials": 5000, "access_logs": 100_000, "invites": 200},
+    "medium": {"users": 10_000, "materials": 50_000, "access_logs": 2_000_000, "invites": 2000},
+    "large": {"users": 50_000, "materials": 200_000, "access_logs": 20_000_000, "invites": 10_000},
+}
+
+BENCH_PASSWORD = "Bench-Senha-123"
+ADMIN_EMAIL = "admin@bench.local"
+PROFESSOR_SHARE = 0.02
+UPLOAD_SHARE = 0.2
+BLOB_COUNT = 64
+BLOB_SIZE = 256 * 1024
+BATCH_SIZE = 20_000
+# Datas fixas: nada depende do relógio de quem gera.
+EPOCH = datetime(2025, 1, 1)
+DATASET_FILE = "dataset.json"
+
+WORDS = (
+    "aula apostila automação banco dados circuito comando controle corrente "
+    "desenho elétrica eletrônica energia ensaio ferramenta fluxo hidráulica "
+    "indústria instalação introdução lógica manutenção máquina mecânica medição "
+    "metrologia motor norma operação pneumática processo programação projeto "
+    "protocolo qualidade rede robótica segurança sensor sistema soldagem "
+    "tecnologia tensão torno usinagem válvula vídeo"
+).split()
+
+
+def _text(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _batched(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(conn, table, rows: Iterator[dict], label: str, total: int, log: Callable[[str], None]) -> None:
+    started = time.monotonic()
+    done = 0
+    for batch in _batched(rows):
+        conn.execute(table.insert(), batch)
+        done += len(batch)
+        if done % (BATCH_SIZE * 50) == 0 or done == total:
+            log(f"  {label}: {done}/{total} ({time.monotonic() - started:.1f}s)")
+
+
+def seed(workdir: Path, scale: Dict[str, int], seed_value: int, log: Callable[[str], None] = print) -> dict:
+    """Cria o banco e os uploads do benchmark em ``workdir`` (já preparado)."""
+    from sqlalchemy.orm import Session
+
+    from app.core.security import pwd_context
+    from app.db.base import Base
+    from app.db.init_db import ensure_indexes
+    from app.db.session import engine
+    from app.models.access_log import AccessLog
+    from app.models.blob import Blob
+    from app.models.invite_token import InviteToken
+    from app.models.material import Material, MaterialSourceType, MaterialType
+    from app.models.user import User, UserRole
+    from app.services.blob_store import blob_path
+    from app.services.search_service import ensure_search_index, rebuild_search_index
+
+    rng = random.Random(seed_value)
+    n_users, n_materials = scale["users"], scale["materials"]
+    n_logs, n_invites = scale["access_logs"], scale["invites"]
+    n_professors = max(1, int(n_users * PROFESSOR_SHARE))
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    # Blobs: poucos arquivos, compartilhados por muitos materiais (dedup).
+    blobs = []
+    for _ in range(BLOB_COUNT):
+        data = rng.randbytes(BLOB_SIZE)
+        digest = sha256(data).hexdigest()
+        path = blob_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        blobs.append(digest)
+
+    password_hash = pwd_context.hash(BENCH_PASSWORD)
+    log(f"Gerando {n_users} usuários, {n_materials} materiais, {n_logs} acessos, {n_invites} convites")
+
+    def users():
+        # id 1: admin; 2..n_professors+1: professores; o resto, alunos
+        for i in range(1, n_users + 1):
+            if i == 1:
+                role, email = UserRole.ADMIN, ADMIN_EMAIL
+            elif i <= n_professors + 1:
+                role, email = UserRole.PROFESSOR, f"professor{i}@bench.local"
+            else:
+                role, email = UserRole.STUDENT, f"aluno{i}@bench.local"
+            yield {
+                "id": i,
+                "name": _text(rng, 2, 3).title(),
+                "email": email,
+                "password_hash": password_hash,
+                "role": role,
+                "is_active": rng.random() > 0.02,
+                "created_at": EPOCH - timedelta(minutes=rng.randint(0, 525_600)),
+            }
+
+    blob_refs = {digest: 0 for digest in blobs}
+
+    def materials():
+        for i in range(1, n_materials + 1):
+            upload = rng.random() < UPLOAD_SHARE
+            digest = blobs[i % BLOB_COUNT] if upload else None
+            if digest:
+                blob_refs[digest] += 1
+            created = EPOCH - timedelta(minutes=rng.randint(0, 525_600))
+            yield {
+                "id": i,
+                "title": _text(rng, 2, 6).capitalize(),
+                "description": _text(rng, 10, 40),
+                "type": MaterialType.VIDEO if rng.random() < 0.3 else MaterialType.DOCUMENT,
+                "source_type": MaterialSourceType.UPLOAD if upload else MaterialSourceType.URL,
+                "file_path": str(blob_path(digest)) if digest else None,
+                "file_size": BLOB_SIZE if digest else None,
+                "file_sha256": digest,
+                "original_filename": f"material-{i}.pdf" if digest else None,
+                "external_url": None if digest else f"https://example.com/material/{i}",
+                "is_active": rng.random() > 0.05,
+                "author_id": rng.randint(1, n_professors + 1),
+                "created_at": created,
+                "updated_at": created,
+            }
+
+    def access_logs():
+        span = 180 * 24 * 3600
+        for i in range(1, n_logs + 1):
+            yield {
+                "id": i,
+                "user_id": rng.randint(1, n_users),
+                "material_id": rng.randint(1, n_materials),
+                "accessed_at": EPOCH + timedelta(seconds=rng.randint(0, span)),
+                "ip": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                "user_agent": "Mozilla/5.0 (bench)",
+            }
+
+    def invites():
+        for i in range(1, n_invites + 1):
+            created = EPOCH + timedelta(minutes=rng.randint(0, 259_200))
+            yield {
+                "id": i,
+                "email": f"convite{i}@bench.local",
+                "token": "%032x" % rng.getrandbits(128),
+                "expires_at": created + timedelta(hours=48),
+                "used": rng.random() < 0.6,
+                "created_by_id": rng.randint(1, n_professors + 1),
+                "created_at": created,
+            }
+
+    started = time.monotonic()
+    with engine.begin() as conn:
+        # Carga única: sem fsync a cada lote
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        _insert(conn, User.__table__, users(), "usuários", n_users, log)
+        _insert(conn, Material.__table__, materials(), "materiais", n_materials, log)
+        conn.execute(Blob.__table__.insert(), [
+            {"sha256": digest, "size": BLOB_SIZE, "ref_count": refs, "created_at": EPOCH}
+            for digest, refs in blob_refs.items()
+        ])
+        _insert(conn, AccessLog.__table__, access_logs(), "acessos", n_logs, log)
+        _insert(conn, InviteToken.__table__, invites(), "convites", n_invites, log)
+
+    ensure_indexes(engine)
+    if ensure_search_index(engine):
+        with Session(bind=engine) as db:
+            rebuild_search_index(db)
+            db.commit()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    dataset = {
+        "scale": scale,
+        "seed": seed_value,
+        "admin_email": ADMIN_EMAIL,
+        "password": BENCH_PASSWORD,
+        "users": n_users,
+        "professors": n_professors,
+        "materials": n_materials,
+        "access_logs": n_logs,
+        "invites": n_invites,
+        "words": list(WORDS),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    (workdir / DATASET_FILE).write_text(json.dumps(dataset, indent=2), encoding="utf-8")
+    log(f"Dados gerados em {dataset['seconds']}s")
+    return dataset
+
+
+def load_dataset(workdir: Path) -> dict:
+    path = workdir / DATASET_FILE
+    if not path.exists():
+        raise SystemExit(f"Sem dados em {workdir}: rode `python -m benchmarks seed` antes.")
+    return json.loads(path.read_text(encoding="utf-8"))
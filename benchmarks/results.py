@@ -0,0 +1,104 @@
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    # Nearest-rank: sempre um valor observado
+    rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, statuses: Dict[int, int], concurrency: int, rss: dict) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "requests": len(ordered),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "min": ms(ordered[0]) if ordered else 0.0,
+            "p50": ms(_percentile(ordered, 50)),
+            "p95": ms(_percentile(ordered, 95)),
+            "p99": ms(_percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else 0.0,
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        },
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+        "peak_rss_kb": rss,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RESULTS_DIR.parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(dataset: dict, options: dict) -> dict:
+    from app.core.config import settings
+
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "dataset": {k: v for k, v in dataset.items() if k not in ("words", "password")},
+        "options": options,
+        "settings": {
+            "DB_MODE": settings.DB_MODE,
+            "DB_PROFILE": settings.DB_PROFILE,
+            "SEARCH_BACKEND": settings.SEARCH_BACKEND,
+            "ACCESS_LOG_DURABILITY": settings.ACCESS_LOG_DURABILITY,
+            "PASSWORD_HASH_WORKERS": settings.PASSWORD_HASH_WORKERS,
+        },
+    }
+
+
+def save(run: dict, output: Optional[Path] = None) -> Path:
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"run-{stamp}.json"
+    output.write_text(json.dumps(run, indent=2, sort_keys=True), encoding="utf-8")
+    return output
+
+
+def load(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(base: dict, other: dict) -> List[str]:
+    """Linhas de comparação por cenário (variação relativa à base)."""
+    def delta(a: float, b: float) -> str:
+        if not a:
+            return "   n/a"
+        return f"{(b - a) / a * 100:+6.1f}%"
+
+    lines = [f"{'cenário':<18} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16} {'req/s':>16}"]
+    for name, a in base["scenarios"].items():
+        b = other["scenarios"].get(name)
+        if b is None:
+            continue
+        la, lb = a["latency_ms"], b["latency_ms"]
+        cols = [
+            f"{lb[p]:>8} {delta(la[p], lb[p])}" for p in ("p50", "p95", "p99")
+        ]
+        cols.append(f"{b['throughput_rps']:>8} {delta(a['throughput_rps'], b['throughput_rps'])}")
+        lines.append(f"{name:<18} " + " ".join(cols))
+    return lines
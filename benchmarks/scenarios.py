@@ -0,0 +1,143 @@
+import asyncio
+import random
+import resource
+import time
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import quote, urlencode
+
+from benchmarks import asgi_client
+from benchmarks.results import summarize
+
+# Cada cenário monta requisições a partir de um Random com semente fixa e as
+# dispara contra o app com `concurrency` tarefas simultâneas. Latências são
+# medidas por requisição (perf_counter) e o pico de RSS é lido ao final.
+
+Request = Tuple[str, str, List[Tuple[str, str]], bytes]
+
+
+def _cookie(uid: int, role: str) -> Tuple[str, str]:
+    from app.core.config import settings
+    from app.core.security import serializer
+
+    return ("cookie", f"{settings.SESSION_COOKIE_NAME}={serializer.dumps({'uid': uid, 'role': role})}")
+
+
+def _student_id(rng: random.Random, dataset: dict) -> int:
+    return rng.randint(dataset["professors"] + 2, max(dataset["professors"] + 2, dataset["users"]))
+
+
+def home_search(rng: random.Random, dataset: dict) -> Request:
+    # Usuário logado: não passa pelo cache de página anônima.
+    q = " ".join(rng.sample(dataset["words"], rng.randint(1, 2)))
+    uid = _student_id(rng, dataset)
+    return "GET", f"/?{urlencode({'q': q})}", [_cookie(uid, "STUDENT")], b""
+
+
+def home_anonymous(rng: random.Random, dataset: dict) -> Request:
+    q = rng.choice(dataset["words"])
+    return "GET", f"/?{urlencode({'q': q})}", [], b""
+
+
+def dashboard(rng: random.Random, dataset: dict) -> Request:
+    uid = rng.randint(2, dataset["professors"] + 1)
+    return "GET", "/materials/dashboard", [_cookie(uid, "PROFESSOR")], b""
+
+
+def open_material(rng: random.Random, dataset: dict) -> Request:
+    uid = _student_id(rng, dataset)
+    material_id = rng.randint(1, dataset["materials"])
+    return "GET", f"/materials/{material_id}/open", [_cookie(uid, "STUDENT")], b""
+
+
+def login_post(rng: random.Random, dataset: dict) -> Request:
+    uid = _student_id(rng, dataset)
+    body = f"email={quote(f'aluno{uid}@bench.local')}&password={quote(dataset['password'])}".encode()
+    headers = [("content-type", "application/x-www-form-urlencoded")]
+    return "POST", "/auth/login", headers, body
+
+
+def admin_list_users(rng: random.Random, dataset: dict) -> Request:
+    return "GET", "/admin/users", [_cookie(1, "ADMIN")], b""
+
+
+HTTP_SCENARIOS: Dict[str, Callable[[random.Random, dict], Request]] = {
+    "home_search": home_search,
+    "home_anonymous": home_anonymous,
+    "dashboard": dashboard,
+    "open_material": open_material,
+    "login_post": login_post,
+    "admin_list_users": admin_list_users,
+}
+# create_backup não é uma rota síncrona (vira job): roda a função direto.
+SCENARIOS = tuple(HTTP_SCENARIOS) + ("create_backup",)
+
+
+def peak_rss_kb() -> Dict[str, int]:
+    # ru_maxrss em KiB no Linux; "children" inclui o pool de hash de senha.
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+async def run_http(app, name: str, dataset: dict, requests: int, concurrency: int, seed: int) -> dict:
+    factory = HTTP_SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}")
+    planned = [factory(rng, dataset) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(planned):
+            method, url, headers, body = planned[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            result = await asgi_client.request(app, method, url, headers, body)
+            latencies.append(time.perf_counter() - started)
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, statuses, concurrency, peak_rss_kb())
+
+
+async def run_backup(iterations: int) -> dict:
+    from starlette.concurrency import run_in_threadpool
+
+    from app.services import backup_service
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await run_in_threadpool(backup_service.create_backup)
+        latencies.append(time.perf_counter() - t0)
+        # Nomes de snapshot têm resolução de segundo
+        await asyncio.sleep(1.0)
+    elapsed = time.perf_counter() - started - iterations * 1.0
+    return summarize(latencies, elapsed, {200: iterations}, 1, peak_rss_kb())
+
+
+async def run_all(
+    app, dataset: dict, names, requests: int, concurrency: int, seed: int,
+    backup_iterations: int, log: Callable[[str], None] = print,
+) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    for name in names:
+        log(f"[{name}] ...")
+        if name == "create_backup":
+            result = await run_backup(backup_iterations)
+        else:
+            # Aquecimento: caches de template, conexões e pool de processos
+            await run_http(app, name, dataset, min(50, requests), concurrency, seed + 1)
+            result = await run_http(app, name, dataset, requests, concurrency, seed)
+        results[name] = result
+        log(
+            f"[{name}] p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms "
+            f"p99={result['latency_ms']['p99']}ms {result['throughput_rps']} req/s "
+            f"rss={result['peak_rss_kb']['self'] // 1024}MiB status={result['status_counts']}"
+        )
+    return results
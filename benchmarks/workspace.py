@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+# Diretório isolado do benchmark: banco, uploads e backups próprios, com
+# templates/ e static/ do projeto ligados por symlink. prepare() precisa rodar
+# antes de qualquer import de app.* (as settings são lidas no import).
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_WORKDIR = REPO_DIR / "benchmarks" / "workdir"
+DB_NAME = "bench.db"
+
+
+def prepare(workdir: Path) -> Path:
+    workdir = workdir.resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    for name in ("templates", "static"):
+        link = workdir / name
+        if not link.exists():
+            link.symlink_to(REPO_DIR / name, target_is_directory=True)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / DB_NAME}"
+    # Sem laços periódicos disputando o banco durante as medições.
+    os.environ.setdefault("ACCESS_ROLLUP_INTERVAL_SECONDS", "0")
+    os.environ.setdefault("TEMPLATE_BYTECODE_DIR", str(workdir / ".jinja_cache"))
+    os.chdir(workdir)
+    return workdir
+
+
+def redirect_backup_dirs(workdir: Path) -> None:
+    """backup_service usa caminhos absolutos do projeto: aponta para o workdir."""
+    from app.services import backup_service
+
+    backup_service.UPLOADS_DIR = workdir / "uploads" / "materials"
+    backup_service.BACKUP_DIR = workdir / "backups"
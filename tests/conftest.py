@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+# Banco e caches próprios dos testes: precisa vir antes de importar o app.
+_workdir = tempfile.mkdtemp(prefix="autohub-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+os.environ["TEMPLATE_BYTECODE_DIR"] = f"{_workdir}/jinja"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import serializer
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.material import Material, MaterialSourceType, MaterialType
+from app.models.user import User, UserRole
+from app.services import catalog_cache
+
+AUTHORS = 5
+
+
+@pytest.fixture(scope="session")
+def users():
+    """(id do admin, ids dos professores), criados uma vez por execução."""
+    db = SessionLocal()
+    try:
+        admin = User(name="Admin", email="admin@test.local", password_hash="x", role=UserRole.ADMIN)
+        professors = [
+            User(name=f"Professor {i}", email=f"professor{i}@test.local", password_hash="x", role=UserRole.PROFESSOR)
+            for i in range(AUTHORS)
+        ]
+        db.add_all([admin, *professors])
+        db.commit()
+        return admin.id, [p.id for p in professors]
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def set_materials(users):
+    """Troca os materiais do banco por ``count`` materiais de vários autores."""
+    _, professor_ids = users
+
+    def _set(count: int) -> None:
+        db = SessionLocal()
+        try:
+            db.query(Material).delete()
+            db.add_all([
+                Material(
+                    title=f"Material {i}",
+                    description="descrição",
+                    type=MaterialType.VIDEO if i % 2 else MaterialType.DOCUMENT,
+                    source_type=MaterialSourceType.URL,
+                    external_url=f"https://example.com/{i}",
+                    author_id=professor_ids[i % len(professor_ids)],
+                )
+                for i in range(count)
+            ])
+            db.commit()
+        finally:
+            db.close()
+        catalog_cache.invalidate()
+
+    return _set
+
+
+@pytest.fixture
+def anonymous_client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_client(users):
+    client = TestClient(app)
+    client.cookies.set(settings.SESSION_COOKIE_NAME, serializer.dumps({"uid": users[0], "role": "ADMIN"}))
+    return client
+
+
+@pytest.fixture
+def set_students():
+    """Troca os alunos do banco por ``count`` alunos."""
+
+    def _set(count: int) -> None:
+        db = SessionLocal()
+        try:
+            db.query(User).filter(User.role == UserRole.STUDENT).delete()
+            db.add_all([
+                User(name=f"Aluno {i}", email=f"aluno{i}@test.local", password_hash="x", role=UserRole.STUDENT)
+                for i in range(count)
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+    return _set
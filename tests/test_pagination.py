@@ -0,0 +1,36 @@
+import base64
+import json
+
+import pytest
+
+# Cursores forjados ou corrompidos não podem derrubar a listagem: a rota
+# ignora o cursor e devolve a primeira página.
+
+MALFORMED_VALUES = [
+    [[1], [2]],
+    [{"a": 1}, 2],
+    [None, None],
+    [{"dt": "não é data"}, 1],
+    [{"dt": 1}, 1],
+    [True, 1],
+    "ab",
+]
+
+
+def _cursor(values) -> str:
+    raw = json.dumps(["n", values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("values", MALFORMED_VALUES)
+@pytest.mark.parametrize("path", ["/", "/api/v1/materials", "/materials/dashboard"])
+def test_malformed_cursor_returns_first_page(admin_client, set_materials, path, values):
+    set_materials(30)
+    first = admin_client.get(path)
+    forged = admin_client.get(path, params={"cursor": _cursor(values)})
+
+    assert forged.status_code == 200
+    if path.startswith("/api/"):
+        assert forged.json()["items"] == first.json()["items"]
+    else:
+        assert forged.text == first.text
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+
+from app.core.principal import invalidate_principal
+from app.db.session import engine
+from app.services import catalog_cache
+
+# Listagens com projeção (app.services.listings): o número de comandos SQL
+# por página é fixo e não cresce com a quantidade de materiais, autores ou
+# alunos. Se uma mudança alterar o esperado, revise antes de ajustar o número.
+
+MANY = 30
+
+
+def _count_queries(client, path: str, uid) -> int:
+    # Mesmo estado de cache nas duas medições: sem usuário nem página guardados
+    if uid is not None:
+        invalidate_principal(uid)
+    catalog_cache.invalidate()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "path, logged_in, rows, expected",
+    [
+        # contagem por tipo + página
+        ("/", False, "materials", 2),
+        # usuário da sessão + contagem por tipo + página
+        ("/", True, "materials", 3),
+        # usuário da sessão + página
+        ("/materials/dashboard", True, "materials", 2),
+        ("/admin/users", True, "students", 2),
+        ("/students/manage", True, "students", 2),
+    ],
+)
+def test_listing_query_count(request, users, path, logged_in, rows, expected):
+    admin_id, _ = users
+    uid = admin_id if logged_in else None
+    client = request.getfixturevalue("admin_client" if logged_in else "anonymous_client")
+    seed = request.getfixturevalue(f"set_{rows}")
+
+    seed(1)
+    single = _count_queries(client, path, uid)
+
+    seed(MANY)
+    many = _count_queries(client, path, uid)
+
+    assert (single, many) == (expected, expected)
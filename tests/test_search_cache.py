@@ -0,0 +1,33 @@
+import pytest
+
+from app.db.session import SessionLocal
+from app.services import listings, search_service
+
+# As contagens por tipo da busca ficam em cache pela chave de search_key:
+# buscas que o banco trata de forma diferente não podem dividir a chave.
+# No ilike o termo vai cru (espaço duplo não casa); no FTS viram tokens.
+
+
+@pytest.mark.parametrize(
+    "fts, expected",
+    [
+        (False, {"material 1": 11, "MATERIAL  1": 0, "Material  1": 0}),
+        (True, {"material 1": 11, "MATERIAL  1": 11, "Material  1": 11}),
+    ],
+)
+def test_search_counts_match_listing(monkeypatch, set_materials, fts, expected):
+    if fts and not search_service.fts_enabled():
+        pytest.skip("SQLite sem FTS5")
+    monkeypatch.setattr(search_service, "_fts_enabled", fts)
+    set_materials(30)
+
+    db = SessionLocal()
+    try:
+        if fts:
+            search_service.rebuild_search_index(db)
+            db.commit()
+        for q, count in expected.items():
+            _, total, page = listings.catalog_page(db, q, None, None, 50)
+            assert (total, len(page.items)) == (count, count), q
+    finally:
+        db.close()